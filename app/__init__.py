@@ -1,7 +1,8 @@
 from flask import Flask
 
 from app.main import bp as main_bp
-from config import FlaskConfig
+from app.main.services import registry
+from config import BaseConfig, FlaskConfig
 
 
 def register_blueprints(app):
@@ -18,4 +19,12 @@ def create_app(config_class=FlaskConfig):
     with app.app_context():
         register_blueprints(app)
 
+    if BaseConfig.PRELOAD_MODELS:
+        # Модели загружаются до fork и разделяются рабочими процессами,
+        # остальное запускается в хуке post_fork (gunicorn.conf.py)
+        registry.preload()
+    else:
+        # Фоновая загрузка моделей (маршрут /readyz сообщает о готовности)
+        registry.start()
+
     return app
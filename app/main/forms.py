@@ -10,4 +10,5 @@ class SearchForm(FlaskForm):
     switch_autocomplete = SubmitField("Тексты")
     switch_autocomplete_wiki = SubmitField("Wikipedia")
     switch_more_results = SubmitField("Вывести больше результатов")
+    switch_semantic = SubmitField("Семантическое ранжирование")
     search_similar = SubmitField("Поиск")
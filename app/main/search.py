@@ -0,0 +1,226 @@
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field
+from itertools import islice
+from threading import BoundedSemaphore
+from typing import Any, Callable, Optional
+
+from common.metrics import observe_stage
+from common.registry import ModelRegistry
+from config import BaseConfig
+
+# Модели дополнения запроса по названию этапа
+EXPANSION_MODELS = {"expand_w2v": "w2v_model", "expand_wiki": "wiki_model"}
+
+
+class StageBusyError(Exception):
+    """Этап поиска пропущен: выполняется максимум его задач."""
+
+
+@dataclass
+class SearchResult:
+    """Результат выполнения поискового запроса.
+
+    Attributes:
+        search_request (str): поисковый запрос из лемм и слов дополнения
+        addon_words (str): слова дополнения запроса
+        articles (dict): найденные статьи с оценками в порядке ранжирования
+        degraded (list[str]): этапы, пропущенные из-за ошибки или таймаута
+        timings (dict[str, float]): время выполнения этапов в секундах
+        reranked (bool): оценки получены семантическим переранжированием
+    """
+
+    search_request: str = ""
+    addon_words: str = ""
+    articles: dict = field(default_factory=dict)
+    degraded: list[str] = field(default_factory=list)
+    timings: dict[str, float] = field(default_factory=dict)
+    reranked: bool = False
+
+
+@dataclass
+class SearchPipeline:
+    """Поиск статей, разбитый на этапы.
+
+    Независимые этапы (дополнение запроса по разным моделям) выполняются
+    параллельно в пуле потоков. Необязательные этапы ограничены таймаутом:
+    если модель не загружена, работает слишком долго или завершилась
+    с ошибкой, этап пропускается, а поиск продолжается без него.
+
+    Задача, превысившая таймаут, продолжает выполняться в своем потоке,
+    поэтому количество одновременно выполняемых задач каждого этапа
+    ограничено max_in_flight: при превышении этап сразу пропускается,
+    а зависший этап не занимает потоки других этапов.
+
+    Attributes:
+        registry (ModelRegistry): реестр моделей
+        timeouts (dict[str, float]): таймауты необязательных этапов в секундах
+        max_workers (int): количество потоков для параллельных этапов
+        max_in_flight (int): максимум выполняемых задач одного этапа
+    """
+
+    registry: ModelRegistry
+    timeouts: dict[str, float] = field(
+        default_factory=lambda: dict(BaseConfig.SEARCH_STAGE_TIMEOUTS)
+    )
+    max_workers: int = BaseConfig.SEARCH_PIPELINE_WORKERS
+    max_in_flight: int = BaseConfig.SEARCH_STAGE_MAX_IN_FLIGHT
+
+    def __post_init__(self):
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="search"
+        )
+        self.in_flight = {
+            name: BoundedSemaphore(self.max_in_flight) for name in self.timeouts
+        }
+
+    @staticmethod
+    def _timed(name: str, func: Callable, result: SearchResult) -> Callable:
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                result.timings[name] = time.perf_counter() - start
+                observe_stage(name, result.timings[name])
+
+        return wrapper
+
+    def run_stage(self, name: str, func: Callable, result: SearchResult, *args):
+        """Выполняет обязательный этап в текущем потоке."""
+        return self._timed(name, func, result)(*args)
+
+    def submit(self, name: str, func: Callable, result: SearchResult, *args) -> Future:
+        """Запускает этап в пуле потоков.
+
+        Если выполняется max_in_flight задач этапа, возвращает завершенную
+        с ошибкой StageBusyError задачу.
+        """
+        semaphore = self.in_flight.setdefault(
+            name, BoundedSemaphore(self.max_in_flight)
+        )
+        if not semaphore.acquire(blocking=False):
+            future = Future()
+            future.set_exception(StageBusyError(name))
+            return future
+        timed = self._timed(name, func, result)
+
+        def run(*args):
+            try:
+                return timed(*args)
+            finally:
+                semaphore.release()
+
+        try:
+            return self.executor.submit(run, *args)
+        except Exception:
+            semaphore.release()
+            raise
+
+    def wait(
+        self, futures: dict[str, Future], result: SearchResult, default: Any = None
+    ) -> dict[str, Any]:
+        """Ожидает необязательные этапы с учетом их таймаутов.
+
+        Для пропущенных этапов возвращает default.
+        """
+        values, start = {}, time.perf_counter()
+        for name, future in futures.items():
+            timeout = self.timeouts.get(name)
+            if timeout is not None:
+                timeout = max(timeout - (time.perf_counter() - start), 0)
+            try:
+                values[name] = future.result(timeout=timeout)
+            except (FutureTimeoutError, StageBusyError):
+                future.cancel()
+                result.degraded.append(name)
+                values[name] = default
+            except Exception as error:
+                print(f"Search stage '{name}' error: {error!r}")
+                result.degraded.append(name)
+                values[name] = default
+        return values
+
+    def _expand(self, words: list[str], stage: str) -> Optional[str]:
+        model = self.registry.get_nowait(EXPANSION_MODELS[stage])
+        if model is None:
+            raise LookupError(f"Модель {EXPANSION_MODELS[stage]} не загружена")
+        return self.registry.get("words_processor").find_similar_words(words, model)
+
+    def prepare(
+        self,
+        search_string: str,
+        result: SearchResult,
+        autocomplete: bool = False,
+        autocomplete_wiki: bool = False,
+    ) -> None:
+        """Формирует поисковый запрос и дополняет его близкими словами."""
+        words_processor = self.registry.get("words_processor")
+        words = self.run_stage(
+            "lemmas", words_processor.get_lemmas, result, search_string
+        )
+        stages = [
+            stage
+            for stage, enabled in zip(
+                EXPANSION_MODELS, (autocomplete, autocomplete_wiki)
+            )
+            if enabled
+        ]
+        futures = {
+            stage: self.submit(stage, self._expand, result, words, stage)
+            for stage in stages
+        }
+        addon_words = ""
+        for addon in self.wait(futures, result, default="").values():
+            addon_words = " ".join([addon_words, addon])
+        result.search_request = " ".join(words)
+        result.addon_words = addon_words
+        if addon_words:
+            result.search_request = f"{result.search_request} {addon_words}"
+
+    def rank(self, result: SearchResult, n: int, semantic: bool = False) -> None:
+        """Находит n статей, наиболее близких к запросу."""
+        search_model = self.registry.get("search_model")
+        embedding_model = self.registry.get_nowait("embedding_model")
+        if not semantic or embedding_model is None:
+            result.articles = self.run_stage(
+                "score", search_model.search_similar, result, result.search_request, n
+            )
+            return
+        candidates = self.run_stage(
+            "score",
+            search_model.search_similar,
+            result,
+            result.search_request,
+            n * BaseConfig.HYBRID_CANDIDATES_FACTOR,
+        )
+        future = self.submit(
+            "rerank",
+            embedding_model.rerank,
+            result,
+            result.search_request,
+            candidates,
+            n,
+            BaseConfig.HYBRID_ALPHA,
+        )
+        articles = self.wait({"rerank": future}, result)["rerank"]
+        result.reranked = articles is not None
+        # Без переранжирования используется порядок TF-IDF
+        result.articles = (
+            articles if articles is not None else dict(islice(candidates.items(), n))
+        )
+
+    def search(
+        self,
+        search_string: str,
+        n: int,
+        autocomplete: bool = False,
+        autocomplete_wiki: bool = False,
+        semantic: bool = False,
+    ) -> SearchResult:
+        """Выполняет поисковый запрос."""
+        result = SearchResult()
+        self.prepare(search_string, result, autocomplete, autocomplete_wiki)
+        self.rank(result, n, semantic)
+        return result
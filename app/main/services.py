@@ -0,0 +1,150 @@
+import os
+
+from gensim.models import KeyedVectors
+
+from common.db_service import get_mongo_db_document_service
+from common.func import get_query_nlp_model
+from common.processors import (
+    KeywordsProcessor,
+    LanguageProcessor,
+    SearchPrepareProcessor,
+)
+from common.registry import ModelRegistry
+from common.stats import CorpusStatsService
+from config import BaseConfig
+from ml_models.models import (
+    DocumentEmbeddingModel,
+    InvertedIndexModel,
+    MultiFieldTfIdfModel,
+    NeighboursTable,
+    TfIdfModel,
+    Word2VecModel,
+)
+
+
+def load_search_model():
+    """Загружает поисковую модель, выбранную в настройках."""
+    if BaseConfig.SEARCH_ENGINE == "inverted_index":
+        search_model = InvertedIndexModel()
+        search_model.load(BaseConfig.INVERTED_INDEX_FILE)
+        search_model.pruning = BaseConfig.INVERTED_INDEX_PRUNING
+        return search_model
+
+    if BaseConfig.SEARCH_ENGINE == "multi_field":
+        search_model = MultiFieldTfIdfModel()
+        model_file = BaseConfig.MULTI_FIELD_MODEL_FILE
+        model_dir = BaseConfig.MULTI_FIELD_MMAP_MODEL_DIR
+    else:
+        search_model = TfIdfModel()
+        model_file = BaseConfig.TF_IDF_MODEL_FILE
+        model_dir = BaseConfig.TF_IDF_MMAP_MODEL_DIR
+    if os.path.isdir(model_dir):
+        search_model.load_mmap(model_dir)
+    else:
+        search_model.load(model_file)
+    if isinstance(search_model, MultiFieldTfIdfModel):
+        search_model.field_weights = BaseConfig.FIELD_WEIGHTS
+    storage = BaseConfig.TF_IDF_STORAGE
+    if storage and storage != search_model.storage:
+        if os.path.isdir(model_dir):
+            # Преобразованная матрица не отображается в память, а копируется
+            # в каждый рабочий процесс
+            print(
+                f"Модель {model_dir} хранится в формате {search_model.storage}, "
+                f"а не {storage}: сохраните ее в этом формате "
+                "с помощью tfidf_model_convert.py"
+            )
+        if storage == "uint8" and search_model.n_shards > 1:
+            print("Формат uint8 не поддерживает поиск по блокам, он отключен")
+            search_model.split_shards(1, search_model.shard_executor)
+        search_model.set_storage(storage)
+    if BaseConfig.TF_IDF_SHARDS > 1 and search_model.storage == "uint8":
+        print("Формат uint8 не поддерживает поиск по блокам, он отключен")
+    elif BaseConfig.TF_IDF_SHARDS > 1:
+        search_model.split_shards(
+            BaseConfig.TF_IDF_SHARDS, BaseConfig.TF_IDF_SHARDS_EXECUTOR
+        )
+    return search_model
+
+
+def get_vocabulary(search_model) -> list:
+    """Возвращает словарь поисковой модели."""
+    if isinstance(search_model, InvertedIndexModel):
+        return search_model.vocabulary
+    return search_model.vectorizer.vocabulary
+
+
+def load_w2v_model() -> Word2VecModel | NeighboursTable:
+    """Загружает таблицу ближайших слов Word2Vec или саму модель."""
+    if os.path.isdir(BaseConfig.W2V_NEIGHBOURS_DIR):
+        neighbours = NeighboursTable()
+        neighbours.load(BaseConfig.W2V_NEIGHBOURS_DIR)
+        return neighbours
+    w2v_model = Word2VecModel()
+    w2v_model.load(BaseConfig.WORD2VEC_MODEL_FILE, mmap="r")
+    return w2v_model
+
+
+def load_wiki_model() -> KeyedVectors | NeighboursTable:
+    """Загружает таблицу ближайших слов или модель Wikipedia."""
+    if os.path.isdir(BaseConfig.WIKI_NEIGHBOURS_DIR):
+        neighbours = NeighboursTable()
+        neighbours.load(BaseConfig.WIKI_NEIGHBOURS_DIR)
+        return neighbours
+    if os.path.exists(BaseConfig.WIKI_MODEL_KV_FILE):
+        return KeyedVectors.load(BaseConfig.WIKI_MODEL_KV_FILE, mmap="r")
+    return KeyedVectors.load_word2vec_format(BaseConfig.WIKI_MODEL_FILE)
+
+
+def load_embedding_model():
+    """Загружает векторы документов (если они построены)."""
+    if not os.path.isdir(BaseConfig.EMBEDDINGS_MODEL_DIR):
+        return None
+    embedding_model = DocumentEmbeddingModel()
+    embedding_model.load(BaseConfig.EMBEDDINGS_MODEL_DIR)
+    if embedding_model.ivf is not None:
+        embedding_model.ivf.n_probe = BaseConfig.ANN_N_PROBE
+    return embedding_model
+
+
+def load_words_processor() -> SearchPrepareProcessor:
+    # Переводы берутся только из кэша, новые слова ставятся в очередь
+    language_processor = LanguageProcessor(
+        target_language="russian", offline=BaseConfig.QUERY_TRANSLATION_OFFLINE
+    )
+    return SearchPrepareProcessor(
+        nlp_model=registry.get("nlp_model"),
+        vocabulary=get_vocabulary(registry.get("search_model")),
+        processor=KeywordsProcessor(language_processor),
+    )
+
+
+def load_corpus_stats() -> CorpusStatsService:
+    """Создает сервис статистики корпуса с фоновым обновлением."""
+    corpus_stats = CorpusStatsService(
+        registry.get("db"),
+        refresh_interval=BaseConfig.CORPUS_STATS_REFRESH_INTERVAL,
+    )
+    corpus_stats.start()
+    return corpus_stats
+
+
+def refresh_corpus_stats(name: str, model) -> None:
+    """Обновляет статистику корпуса после перезагрузки поисковой модели."""
+    if name == "search_model" and registry.entries["corpus_stats"].status == "ready":
+        registry.get("corpus_stats").refresh()
+
+
+registry = ModelRegistry(on_load=[refresh_corpus_stats])
+eager = BaseConfig.MODELS_EAGER_LOADING
+registry.register("search_model", load_search_model, eager=eager)
+registry.register("nlp_model", get_query_nlp_model, eager=eager)
+registry.register("w2v_model", load_w2v_model, eager=eager)
+# Без модели Wikipedia поиск работает, пропуская дополнение запроса
+registry.register("wiki_model", load_wiki_model, eager=eager, required=False)
+registry.register("words_processor", load_words_processor, eager=eager)
+# Соединение с базой данных и фоновые потоки создаются в рабочих процессах
+registry.register("db", get_mongo_db_document_service, eager=eager, preload=False)
+registry.register("corpus_stats", load_corpus_stats, eager=eager, preload=False)
+# Семантическое ранжирование необязательно для готовности сервиса
+registry.register("embedding_model", load_embedding_model, eager=eager, required=False)
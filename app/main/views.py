@@ -1,98 +1,234 @@
 import datetime
-import os
-from zipfile import ZipFile
 
-from flask import render_template, request
-from gensim.models import KeyedVectors
+from flask import Response, g, jsonify, render_template, request
 
-from common.db_service import get_mongo_db_document_service
-from common.func import get_nlp_model
-from common.models import ArticleDocument
-from common.processors import (
-    KeywordsProcessor,
-    LanguageProcessor,
-    SearchPrepareProcessor,
+from common.cache import LRUCache, TTLCache
+from common.metrics import (
+    finish_request,
+    log_slow_query,
+    metrics,
+    start_request,
+    timer,
 )
-from config import BaseConfig, DocumentStatusType
-from ml_models.models import TfIdfModel, Word2VecModel
+from common.models import ArticleDocument
+from config import BaseConfig
 from . import bp
 from .forms import SearchForm
+from .search import SearchPipeline, SearchResult
+from .services import registry
+
+# Конвейер поиска с параллельными этапами дополнения запроса
+search_pipeline = SearchPipeline(registry)
 
-tfidf_model = TfIdfModel()
-tfidf_model.load(BaseConfig.TF_IDF_MODEL_FILE)
+# Кэш карточек статей (ссылка и URL) для вывода результатов
+article_cards = LRUCache(maxsize=BaseConfig.ARTICLE_CARDS_CACHE_SIZE)
+# Кэш ранжированных списков статей для постраничной выдачи API
+ranked_results = TTLCache(
+    maxsize=BaseConfig.API_RESULTS_CACHE_SIZE, ttl=BaseConfig.API_RESULTS_CACHE_TTL
+)
 
-w2v_model = Word2VecModel()
-w2v_model.load(BaseConfig.WORD2VEC_MODEL_FILE)
+metrics.add_cache("article_cards", lambda: article_cards)
+metrics.add_cache("ranked_results", lambda: ranked_results)
+metrics.add_cache(
+    "lemmas",
+    lambda: getattr(registry.entries["words_processor"].value, "lemmas_cache", None),
+)
 
-wiki_model = KeyedVectors.load_word2vec_format(BaseConfig.WIKI_MODEL_FILE)
 
-language_processor = LanguageProcessor(target_language="russian")
-language_processor.load_translations(BaseConfig.TRANSLATIONS_CACHE_FILE)
+@bp.before_request
+def start_request_timer():
+    start_request()
 
-words_processor = SearchPrepareProcessor(
-    nlp_model=get_nlp_model(),
-    prediction_model=w2v_model,
-    wiki_model=wiki_model,
-    vocabulary=tfidf_model.vectorizer.vocabulary,
-    processor=KeywordsProcessor(language_processor),
-)
 
-db = get_mongo_db_document_service()
+@bp.teardown_request
+def finish_request_timer(error=None):
+    breakdown = finish_request(request.endpoint or "")
+    if "search_query" in g:
+        log_slow_query(g.search_query, {**g.search_timings, **breakdown})
+
+
+def get_article_cards(ids: list) -> dict:
+    """Возвращает карточки статей в порядке ids.
+
+    Недостающие в кэше карточки загружаются одним запросом к базе данных
+    только с полями, которые выводятся на странице результатов.
+    """
+    db = registry.get("db")
+    cards = article_cards.get_many(ids)
+    missing = [_id for _id in ids if _id not in cards]
+    if missing:
+        projection = {name: 1 for name in BaseConfig.ARTICLE_CARD_FIELDS}
+        for document in db.get_by_ids(missing, projection=projection):
+            article = ArticleDocument(**document)
+            data, url = article.reference.split(" URL: ")
+            url = url.replace(" (дата обращения:).", "")
+            article.reference = data
+            cards[article._id] = (article, url)
+            article_cards.set(article._id, (article, url))
+    return {_id: cards[_id] for _id in ids if _id in cards}
+
+
+def format_score(score: float, percent: bool = True) -> str:
+    """Оценка близости статьи для страницы результатов.
+
+    Оценки BM25 не ограничены единицей и выводятся без процентов.
+    """
+    return f"{score * 100:.2f}%" if percent else f"{score:.2f}"
 
 
 @bp.route("/", methods=["GET", "POST"])
 @bp.route("/index", methods=["GET", "POST"])
 def index():
     form = SearchForm()
+    embedding_model = registry.get_nowait("embedding_model")
     date = datetime.date.today().strftime("%d.%m.%Y")
-    articles, addon_words, search_request = {}, "", ""
+    articles, result = {}, SearchResult()
+    # Общее количество обработанных статей (параллельно с поиском)
+    stats_future = search_pipeline.submit(
+        "stats", lambda: registry.get("corpus_stats").total_articles, result
+    )
     # Положение переключателей
     switch_autocomplete = request.form.get("switch_autocomplete") is not None
     switch_more_results = request.form.get("switch_more_results") is not None
     switch_autocomplete_wiki = request.form.get("switch_autocomplete_wiki") is not None
-
-    # Общее количество обработанных статей
-    total_articles = db.repository.collection.count_documents(
-        {
-            "parse_status": DocumentStatusType.COMPLETED,
-            "processing_status": DocumentStatusType.COMPLETED,
-            "lemmatization_status": DocumentStatusType.COMPLETED,
-        }
-    )
+    switch_semantic = request.form.get("switch_semantic") is not None
 
     if request.method == "POST" and form.validate_on_submit():
         search_string = request.form.get("search_string")
         search_results_number = BaseConfig.SEARCH_RESULTS
-        search_request = words_processor.process_text(search_string)
-        if request.form.get("switch_autocomplete"):
-            addon_words = ' '.join([addon_words, words_processor.add_similar_words(search_string)])
-        if request.form.get("switch_autocomplete_wiki"):
-            addon_words = ' '.join([addon_words, words_processor.add_similar_words(search_string, model="wiki")])
         if request.form.get("switch_more_results"):
             search_results_number += 10
-        if addon_words:
-            search_request = f"{search_request} {addon_words}"
-        similar_articles = tfidf_model.search_similar(
-            search_request, search_results_number
+        result = search_pipeline.search(
+            search_string,
+            search_results_number,
+            switch_autocomplete,
+            switch_autocomplete_wiki,
+            switch_semantic,
         )
-        for _id, percent in similar_articles.items():
-            article = ArticleDocument(**db.get_by_id(_id))
-            data, url = article.reference.split(" URL: ")
-            url = url.replace(" (дата обращения:).", "")
-            percent = f"{percent * 100:.2f}%"
-            article.reference = data
-            articles[_id] = [article, url, date, percent]
+        similar_articles = result.articles
+        g.search_query, g.search_timings = search_string, result.timings
+        with timer("hydrate"):
+            cards = get_article_cards(list(similar_articles))
+        percent = result.reranked or (
+            getattr(registry.get("search_model"), "scoring", None) != "bm25"
+        )
+        for _id, (article, url) in cards.items():
+            score = format_score(similar_articles[_id], percent)
+            articles[_id] = [article, url, date, score]
+
+    total_articles = search_pipeline.wait({"stats": stats_future}, result)["stats"]
 
     return render_template(
         "index.html",
         total_articles=total_articles,
         form=form,
         articles=articles,
-        search_request=search_request,
-        addon_words=addon_words,
+        search_request=result.search_request,
+        addon_words=result.addon_words,
         switch_autocomplete=switch_autocomplete,
         switch_more_results=switch_more_results,
         switch_autocomplete_wiki=switch_autocomplete_wiki,
+        switch_semantic=switch_semantic,
+        semantic_available=embedding_model is not None,
+    )
+
+
+@bp.route("/api/search")
+def api_search():
+    """Поиск статей с постраничной выдачей в формате JSON.
+
+    Параметры: q - строка запроса, offset и limit - страница результатов,
+    autocomplete, autocomplete_wiki, semantic - дополнение запроса и
+    семантическое ранжирование (1 - включено).
+    Ранжированный список статей запроса кэшируется, поэтому следующие
+    страницы выдаются без повторного поиска.
+    """
+    search_string = request.args.get("q", "").strip()
+    if not search_string:
+        return jsonify({"error": "Не указан поисковый запрос (q)"}), 400
+    offset = max(request.args.get("offset", 0, type=int), 0)
+    limit = request.args.get("limit", BaseConfig.SEARCH_RESULTS, type=int)
+    limit = min(max(limit, 1), BaseConfig.API_MAX_LIMIT)
+    options = tuple(
+        request.args.get(name, 0, type=int) == 1
+        for name in ("autocomplete", "autocomplete_wiki", "semantic")
+    )
+
+    key = (" ".join(search_string.lower().split()), options)
+    depth, ranked, search_request, addon_words = ranked_results.get(
+        key, (0, [], "", "")
+    )
+    # Список ранжируется заново, только если запрошенная страница глубже
+    # ранее найденных результатов (но не глубже API_MAX_RESULTS)
+    end = min(offset + limit, BaseConfig.API_MAX_RESULTS)
+    if not depth or (end > depth and len(ranked) == depth):
+        depth = min(
+            max(end, BaseConfig.API_RESULTS_DEPTH),
+            BaseConfig.API_MAX_RESULTS,
+        )
+        result = search_pipeline.search(search_string, depth, *options)
+        g.search_query, g.search_timings = search_string, result.timings
+        search_request, addon_words = result.search_request, result.addon_words
+        ranked = list(result.articles.items())
+        # Результаты неполного поиска (пропущенные этапы) не кэшируются
+        if not result.degraded:
+            ranked_results.set(key, (depth, ranked, search_request, addon_words))
+
+    page = dict(ranked[offset:end])
+    results = []
+    with timer("hydrate"):
+        cards = get_article_cards(list(page))
+    for _id, (article, url) in cards.items():
+        results.append(
+            {
+                "id": str(_id),
+                "score": page[_id],
+                "title": article.title,
+                "authors": article.authors,
+                "year": article.year,
+                "magazine": article.magazine,
+                "reference": article.reference,
+                "url": url,
+            }
+        )
+    return jsonify(
+        {
+            "query": search_string,
+            "search_request": search_request,
+            "addon_words": addon_words.strip(),
+            "offset": offset,
+            "limit": limit,
+            "total": len(ranked),
+            "results": results,
+        }
+    )
+
+
+@bp.route("/metrics")
+def metrics_view():
+    """Метрики поиска в текстовом формате Prometheus."""
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
+@bp.route("/stats")
+def stats():
+    """Статистика корпуса документов по этапам обработки."""
+    return jsonify(registry.get("corpus_stats").stats)
+
+
+@bp.route("/healthz")
+def healthz():
+    """Проверка работоспособности процесса."""
+    return jsonify({"status": "ok"})
+
+
+@bp.route("/readyz")
+def readyz():
+    """Проверка готовности к поиску (все необходимые модели загружены)."""
+    ready = registry.is_ready()
+    return (
+        jsonify({"status": "ready" if ready else "loading", "models": registry.info()}),
+        200 if ready else 503,
     )
 
 
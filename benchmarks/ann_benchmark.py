@@ -0,0 +1,51 @@
+import argparse
+import time
+
+import numpy as np
+
+from ml_models.func import get_top_n
+from ml_models.models import IVFIndex
+
+
+def get_embeddings(
+    n_docs: int, dim: int = 300, n_topics: int = 500, seed: int = 0
+) -> np.ndarray:
+    """Создает нормализованные векторы документов, сгруппированные по темам."""
+    rng = np.random.default_rng(seed)
+    topics = rng.normal(size=(n_topics, dim)).astype(np.float32)
+    vectors = topics[rng.integers(0, n_topics, n_docs)]
+    vectors += rng.normal(scale=0.8, size=(n_docs, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Полнота и задержка IVF в сравнении с полным перебором"
+    )
+    parser.add_argument("--docs", type=int, default=300000)
+    parser.add_argument("--lists", type=int, default=512)
+    parser.add_argument("--probes", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    # Запросы - отложенные векторы из того же распределения, что и корпус
+    vectors = get_embeddings(args.docs + args.queries)
+    embeddings, queries = vectors[: args.docs], vectors[args.docs :]
+    index = IVFIndex()
+    start = time.perf_counter()
+    index.fit(embeddings, args.lists)
+    print(f"Построение индекса: {time.perf_counter() - start:.1f} с")
+
+    start = time.perf_counter()
+    expected = [set(get_top_n(embeddings @ query, args.top)[0]) for query in queries]
+    exact = (time.perf_counter() - start) / len(queries) * 1000
+    print(f"{'n_probe':>8} {'recall':>8} {'ms':>8} {'speedup':>8}")
+    print(f"{'exact':>8} {1:>8.3f} {exact:>8.2f} {1:>8.1f}")
+    for n_probe in args.probes:
+        index.n_probe = n_probe
+        start = time.perf_counter()
+        found = [set(index.search(embeddings, query, args.top)[0]) for query in queries]
+        latency = (time.perf_counter() - start) / len(queries) * 1000
+        recall = np.mean([len(a & b) / max(len(a), 1) for a, b in zip(expected, found)])
+        print(f"{n_probe:>8} {recall:>8.3f} {latency:>8.2f} {exact / latency:>8.1f}")
@@ -0,0 +1,75 @@
+import argparse
+import time
+
+from pymongo import MongoClient
+
+from common.db_repository import MongoDbRepository
+from common.db_service import BulkWriter, MongoDbCrudService, get_changed_fields
+from common.models import ArticleDocument
+from config import DocumentStatusType
+
+
+def get_documents(n_docs: int, text_size: int) -> list[dict]:
+    """Создает статьи с текстом заданного размера."""
+    return [
+        ArticleDocument(
+            _id=i,
+            title=f"Статья {i}",
+            abstract="аннотация " * 50,
+            keywords=["ключевое", "слово"],
+            reference=f"Ссылка {i} URL: https://example.org/{i}",
+            text="текст статьи " * (text_size // 13),
+            language="russian",
+            parse_status=DocumentStatusType.COMPLETED,
+        ).to_dict()
+        for i in range(n_docs)
+    ]
+
+
+def process(document: dict) -> dict:
+    """Изменения документа, как при предобработке."""
+    document = dict(document)
+    document["text"] = document["text"].upper()
+    document["processing_status"] = DocumentStatusType.COMPLETED
+    return document
+
+
+def update_one_full(service: MongoDbCrudService, records: list[dict]) -> None:
+    for record in records:
+        service.update({"_id": record["_id"]}, {"$set": process(record)})
+
+
+def bulk_write_changed(service: MongoDbCrudService, records: list[dict]) -> None:
+    with BulkWriter(service) as writer:
+        for record in records:
+            writer.update(
+                {"_id": record["_id"]},
+                {"$set": get_changed_fields(record, process(record))},
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Скорость записи результатов предобработки в MongoDB"
+    )
+    parser.add_argument("--url", default="mongodb://localhost:27017")
+    parser.add_argument("--docs", type=int, default=5000)
+    parser.add_argument("--text-size", type=int, default=50000)
+    args = parser.parse_args()
+
+    client = MongoClient(args.url)
+    collection = client["benchmarks"]["bulk_write"]
+    service = MongoDbCrudService(MongoDbRepository(client["benchmarks"], "bulk_write"))
+    documents = get_documents(args.docs, args.text_size)
+    for name, func in [
+        ("update_one, весь документ", update_one_full),
+        ("bulk_write, измененные поля", bulk_write_changed),
+    ]:
+        collection.drop()
+        collection.insert_many(documents)
+        records = list(collection.find())
+        start = time.perf_counter()
+        func(service, records)
+        elapsed = time.perf_counter() - start
+        print(f"{name:>30}: {len(records) / elapsed:>10.0f} документов/с")
+    collection.drop()
@@ -0,0 +1,118 @@
+import argparse
+import glob
+import random
+import time
+
+from common.processors import TextProcessor
+
+# Фрагменты, характерные для OCR текстов статей
+OCR_FRAGMENTS = [
+    "Рассмотрим уравнение теплопроводности",
+    "с начальными условиями",
+    "Теорема 1.2.",
+    "Доказательство.",
+    "где f(x) = 0,5 x^2 + 3",
+    "см. [12, 15]",
+    "т. е.",
+    "и т. д.",
+    "в силу леммы 3",
+    "УДК 517.9",
+    "e-mail: author@example.org",
+    "Pис. 4. Зависимость",
+    "— — —",
+    "...",
+    ",,",
+    "о б р а з о м",
+    "Ключевые слова: модель, алгоритм,оценка",
+    "Bыполнено.Результаты",
+    "к  задаче",
+    "ё",
+    "\n",
+    "\t",
+    "«кавычки»",
+    "(1) - (3)",
+    "п р и м е р",
+]
+
+
+def get_synthetic_texts(n_texts: int, text_size: int, seed: int = 0) -> list[str]:
+    """Создает тексты из фрагментов OCR заданного размера."""
+    rnd = random.Random(seed)
+    texts = []
+    for _ in range(n_texts):
+        parts, size = [], 0
+        while size < text_size:
+            part = rnd.choice(OCR_FRAGMENTS)
+            parts.append(part)
+            size += len(part) + 1
+        texts.append(rnd.choice([" ", "", "\n"]).join(parts))
+    return texts
+
+
+def get_sample_texts(pattern: str) -> list[str]:
+    """Загружает тексты статей из файлов."""
+    texts = []
+    for filename in sorted(glob.glob(pattern)):
+        with open(filename, "r", encoding="utf8") as sample_file:
+            texts.append(sample_file.read())
+    return texts
+
+
+def get_db_texts(n_texts: int) -> list[str]:
+    """Загружает необработанные тексты статей из MongoDB."""
+    from common.db_service import get_mongo_db_document_service
+    from config import DocumentStatusType
+
+    database = get_mongo_db_document_service()
+    records = database.list(
+        {
+            "parse_status": DocumentStatusType.COMPLETED,
+            "processing_status": DocumentStatusType.WAITING,
+        },
+        projection=["text"],
+    ).limit(n_texts)
+    return [record.get("text", "") for record in records if record.get("text")]
+
+
+def measure(func, texts: list[str], repeat: int) -> float:
+    """Лучшая скорость обработки текстов в МБ/с."""
+    size = sum(len(text.encode("utf8")) for text in texts) / 2**20
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in texts:
+            func(text)
+        best = min(best, time.perf_counter() - start)
+    return size / best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Скорость очистки текстов статей")
+    parser.add_argument("--samples", help="шаблон файлов с текстами статей")
+    parser.add_argument(
+        "--db", action="store_true", help="необработанные статьи из MongoDB"
+    )
+    parser.add_argument("--texts", type=int, default=50)
+    parser.add_argument("--text-size", type=int, default=40000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    processor = TextProcessor()
+
+    # Тексты статей: файлы, база данных или синтетические фрагменты OCR
+    if args.samples:
+        texts = get_sample_texts(args.samples)
+    elif args.db:
+        texts = get_db_texts(args.texts)
+    else:
+        texts = get_synthetic_texts(args.texts, args.text_size)
+    texts = [processor.fix_letters(text) for text in texts]
+    print(f"Текстов: {len(texts)}")
+
+    # Скорость обработки
+    print(f"{'':>18} {'МБ/с':>8}")
+    for name, func in {
+        "проходы re.sub": processor.cleanup_passes,
+        "cleanup": processor.cleanup,
+    }.items():
+        print(f"{name:>18} {measure(func, texts, args.repeat):>8.2f}")
@@ -0,0 +1,87 @@
+import time
+from typing import Callable
+
+import numpy as np
+from bson import ObjectId
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfTransformer
+
+from ml_models.func import get_tfidf_vectorizer
+from ml_models.models import InvertedIndexModel, TfIdfModel
+
+
+def get_vocabulary(size: int) -> list[str]:
+    """Возвращает синтетический словарь лемм."""
+    return [f"лемма{i}" for i in range(size)]
+
+
+def get_counts_matrix(
+    n_docs: int, vocab_size: int, doc_len: int = 200, seed: int = 0
+) -> sparse.csr_matrix:
+    """Создает матрицу частот слов с распределением Ципфа."""
+    rng = np.random.default_rng(seed)
+    lengths = rng.poisson(doc_len, n_docs).clip(1)
+    columns = (rng.zipf(1.3, lengths.sum()) - 1) % vocab_size
+    rows = np.repeat(np.arange(n_docs), lengths)
+    counts = sparse.csr_matrix(
+        (np.ones(columns.size), (rows, columns)), shape=(n_docs, vocab_size)
+    )
+    counts.sum_duplicates()
+    return counts
+
+
+def get_objects_ids(n_docs: int) -> dict[int, ObjectId]:
+    """Возвращает детерминированные ObjectId для строк матрицы."""
+    return {i: ObjectId(i.to_bytes(12, "big")) for i in range(n_docs)}
+
+
+def get_tfidf_model(
+    n_docs: int, vocab_size: int = 10000, doc_len: int = 200, seed: int = 0
+) -> TfIdfModel:
+    """Создает TF-IDF модель на синтетическом корпусе."""
+    vocabulary = get_vocabulary(vocab_size)
+    counts = get_counts_matrix(n_docs, vocab_size, doc_len, seed)
+    transformer = TfidfTransformer().fit(counts)
+    vectorizer = get_tfidf_vectorizer(vocabulary)
+    vectorizer.idf_ = transformer.idf_
+    return TfIdfModel(
+        vectorizer=vectorizer,
+        matrix=transformer.transform(counts).tocsr(),
+        matrix_objects=get_objects_ids(n_docs),
+    )
+
+
+def get_inverted_index(
+    n_docs: int,
+    vocab_size: int = 10000,
+    doc_len: int = 200,
+    seed: int = 0,
+    scoring: str = "bm25",
+) -> InvertedIndexModel:
+    """Создает инвертированный индекс на синтетическом корпусе."""
+    model = InvertedIndexModel(vocabulary=get_vocabulary(vocab_size), scoring=scoring)
+    model.build(
+        get_counts_matrix(n_docs, vocab_size, doc_len, seed), get_objects_ids(n_docs)
+    )
+    return model
+
+
+def get_queries(
+    vocabulary: list[str], number: int = 100, words: tuple = (2, 4), seed: int = 1
+) -> list[str]:
+    """Создает поисковые запросы из случайных лемм словаря."""
+    rng = np.random.default_rng(seed)
+    return [
+        " ".join(rng.choice(vocabulary[:1000], rng.integers(*words)))
+        for _ in range(number)
+    ]
+
+
+def measure(func: Callable, queries: list[str], *args, **kwargs) -> float:
+    """Возвращает медианное время выполнения запроса в миллисекундах."""
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        func(query, *args, **kwargs)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings) * 1000)
@@ -0,0 +1,31 @@
+import argparse
+
+from benchmarks.func import (
+    get_inverted_index,
+    get_queries,
+    get_tfidf_model,
+    get_vocabulary,
+    measure,
+)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Сравнение инвертированного индекса и произведения матриц"
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 300000])
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    queries = get_queries(get_vocabulary(10000), args.queries)
+    print(f"{'docs':>10} {'matrix, ms':>12} {'tfidf, ms':>12} {'bm25, ms':>12}")
+    for size in args.sizes:
+        matrix_model = get_tfidf_model(size)
+        tfidf_index = get_inverted_index(size, scoring="tfidf")
+        bm25_index = get_inverted_index(size, scoring="bm25")
+        print(
+            f"{size:>10}"
+            f" {measure(matrix_model.search_similar, queries, args.top):>12.2f}"
+            f" {measure(tfidf_index.search_similar, queries, args.top):>12.2f}"
+            f" {measure(bm25_index.search_similar, queries, args.top):>12.2f}"
+        )
@@ -0,0 +1,43 @@
+import argparse
+
+import numpy as np
+
+from benchmarks.func import get_inverted_index, get_vocabulary, measure
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Отсечение документов (MaxScore) в инвертированном индексе"
+    )
+    parser.add_argument("--docs", type=int, default=300000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--words", type=int, nargs="+", default=[2, 4, 8, 16])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    vocabulary = get_vocabulary(10000)
+    print(
+        f"{'words':>6} {'scoring':>8} {'full, ms':>10} {'pruned, ms':>11} {'skipped':>8}"
+    )
+    for scoring in ["bm25", "tfidf"]:
+        model = get_inverted_index(args.docs, scoring=scoring)
+        for words in args.words:
+            # Частые леммы, как при дополнении запроса словами Word2Vec
+            queries = [
+                " ".join(rng.choice(vocabulary[:300], words))
+                for _ in range(args.queries)
+            ]
+            total = evaluated = 0
+            for query in queries:
+                expected, _ = model.search_top_k(query, args.top, pruning=False)
+                result, stats = model.search_top_k(query, args.top, pruning=True)
+                if list(result) != list(expected):
+                    raise AssertionError("Выдача с отсечением отличается")
+                total += stats.total
+                evaluated += stats.evaluated
+            full = measure(model.search_top_k, queries, args.top, pruning=False)
+            pruned = measure(model.search_top_k, queries, args.top, pruning=True)
+            print(
+                f"{words:>6} {scoring:>8} {full:>10.2f} {pruned:>11.2f}"
+                f" {1 - evaluated / max(total, 1):>8.1%}"
+            )
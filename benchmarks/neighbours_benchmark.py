@@ -0,0 +1,45 @@
+import argparse
+import time
+
+import numpy as np
+from gensim.models import KeyedVectors
+
+from ml_models.models import NeighboursTable
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Дополнение запроса: most_similar модели и таблица соседей"
+    )
+    parser.add_argument("--words", type=int, default=200000)
+    parser.add_argument("--vocab", type=int, default=10000)
+    parser.add_argument("--dim", type=int, default=300)
+    parser.add_argument("--top", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    keyed_vectors = KeyedVectors(args.dim)
+    keyed_vectors.add_vectors(
+        [f"слово{i}" for i in range(args.words)],
+        rng.normal(size=(args.words, args.dim)).astype(np.float32),
+    )
+    vocabulary = [f"слово{i}" for i in range(args.vocab)]
+
+    start = time.perf_counter()
+    table = NeighboursTable()
+    table.build(vocabulary, keyed_vectors, topn=10)
+    print(f"Построение таблицы: {time.perf_counter() - start:.1f} с")
+
+    queries = rng.choice(vocabulary, 200)
+    for name, model in [("most_similar", keyed_vectors), ("таблица", table)]:
+        start = time.perf_counter()
+        results = [model.most_similar(word, topn=args.top) for word in queries]
+        latency = (time.perf_counter() - start) / len(queries) * 1000
+        print(f"{name:>14}: {latency:.3f} мс на слово")
+        if name == "most_similar":
+            expected = results
+    matched = sum(
+        [w for w, _ in a] == [w for w, _ in b]
+        and np.allclose([p for _, p in a], [p for _, p in b], atol=1e-5)
+        for a, b in zip(expected, results)
+    )
+    print(f"Совпадение результатов: {matched}/{len(queries)}")
@@ -0,0 +1,88 @@
+import argparse
+import time
+
+import numpy as np
+
+from common.func import get_nlp_model, get_query_nlp_model, lemmatization
+from common.processors import (
+    KeywordsProcessor,
+    LanguageProcessor,
+    SearchPrepareProcessor,
+)
+
+QUERIES = [
+    "дифференциальные уравнения",
+    "теория вероятностей",
+    "численные методы решения",
+    "математическая модель теплопроводности",
+    "устойчивость динамических систем",
+    "преобразование Фурье",
+    "задача Коши",
+    "нейронные сети",
+    "оптимальное управление",
+    "теория графов",
+]
+
+
+def measure(func, queries: list[str], repeat: int) -> tuple[float, float]:
+    """Медиана и 95-й перцентиль времени обработки запроса в миллисекундах."""
+    timings = []
+    for _ in range(repeat):
+        for query in queries:
+            start = time.perf_counter()
+            func(query)
+            timings.append(time.perf_counter() - start)
+    return (
+        float(np.median(timings) * 1000),
+        float(np.percentile(timings, 95) * 1000),
+    )
+
+
+def get_processor(nlp_model, cache_size: int) -> SearchPrepareProcessor:
+    return SearchPrepareProcessor(
+        nlp_model=nlp_model,
+        vocabulary=[],
+        processor=KeywordsProcessor(LanguageProcessor()),
+        cache_size=cache_size,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Задержка нормализации коротких поисковых запросов"
+    )
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    full_model, query_model = get_nlp_model(), get_query_nlp_model()
+    print("Компоненты полной модели:", full_model.pipe_names)
+    print("Компоненты модели запросов:", query_model.pipe_names)
+
+    # Совпадение лемм полной модели и модели для запросов
+    matched = sum(
+        lemmatization(full_model(query)) == lemmatization(query_model(query))
+        for query in QUERIES
+    )
+    print(f"Совпадение лемм: {matched}/{len(QUERIES)}")
+
+    cases = {
+        "полная модель, дважды": (
+            get_processor(full_model, 0),
+            lambda processor, query: (
+                processor.get_lemmas(query),
+                processor.get_lemmas(query),
+            ),
+        ),
+        "модель запросов": (
+            get_processor(query_model, 0),
+            lambda processor, query: processor.get_lemmas(query),
+        ),
+        "модель запросов и кэш": (
+            get_processor(query_model, 1024),
+            lambda processor, query: processor.get_lemmas(query),
+        ),
+    }
+    print(f"{'':>24} {'p50 ms':>8} {'p95 ms':>8}")
+    for name, (processor, func) in cases.items():
+        p50, p95 = measure(lambda query: func(processor, query), QUERIES, args.repeat)
+        print(f"{name:>24} {p50:>8.2f} {p95:>8.2f}")
@@ -0,0 +1,32 @@
+import argparse
+
+from benchmarks.func import get_queries, get_tfidf_model, get_vocabulary, measure
+from ml_models.models import TfIdfModel
+
+
+def legacy_search_similar(model: TfIdfModel, search_lemma: str, n: int) -> dict:
+    """Прежняя реализация поиска с полной сортировкой оценок."""
+    new_vector = model.vectorizer.transform([search_lemma]).transpose()
+    cos_similarity = model.matrix.dot(new_vector).toarray()
+    sorted_objects = sorted(
+        enumerate(cos_similarity), key=lambda x: x[1], reverse=True
+    )[:n]
+    return {model.matrix_objects[key]: sum(val) for key, val in sorted_objects}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Задержка поиска TF-IDF")
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10000, 100000, 300000, 1000000]
+    )
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    queries = get_queries(get_vocabulary(10000), args.queries)
+    print(f"{'docs':>10} {'sorted, ms':>12} {'top-k, ms':>12} {'speedup':>8}")
+    for size in args.sizes:
+        model = get_tfidf_model(size)
+        legacy = measure(lambda q: legacy_search_similar(model, q, args.top), queries)
+        current = measure(model.search_similar, queries, args.top)
+        print(f"{size:>10} {legacy:>12.2f} {current:>12.2f} {legacy / current:>8.1f}")
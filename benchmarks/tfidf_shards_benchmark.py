@@ -0,0 +1,28 @@
+import argparse
+import os
+
+from benchmarks.func import get_queries, get_tfidf_model, get_vocabulary, measure
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Масштабирование поиска по блокам")
+    parser.add_argument("--docs", type=int, default=1000000)
+    parser.add_argument("--max-shards", type=int, default=os.cpu_count())
+    parser.add_argument("--executor", choices=["thread", "process"], default="thread")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    model = get_tfidf_model(args.docs)
+    queries = get_queries(get_vocabulary(10000), args.queries)
+    expected = [model.search_similar(query, args.top) for query in queries]
+    baseline = measure(model.search_similar, queries, args.top)
+
+    print(f"{'shards':>6} {'latency, ms':>12} {'speedup':>8}")
+    print(f"{1:>6} {baseline:>12.2f} {1.0:>8.2f}")
+    for n_shards in range(2, args.max_shards + 1):
+        model.split_shards(n_shards, args.executor)
+        if [model.search_similar(query, args.top) for query in queries] != expected:
+            raise AssertionError("Результаты поиска по блокам отличаются")
+        latency = measure(model.search_similar, queries, args.top)
+        print(f"{n_shards:>6} {latency:>12.2f} {baseline / latency:>8.2f}")
+    model.split_shards(1)
@@ -0,0 +1,60 @@
+import argparse
+from copy import deepcopy
+
+from benchmarks.func import get_queries, get_tfidf_model, get_vocabulary, measure
+from ml_models.models import TfIdfModel
+
+
+def get_matrix_size(model: TfIdfModel) -> int:
+    """Возвращает объем массивов матрицы в байтах."""
+    matrix = model.matrix
+    size = matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes
+    if model.row_scales is not None:
+        size += model.row_scales.nbytes
+    return size
+
+
+def get_recall(expected: list[dict], found: list[dict]) -> float:
+    """Возвращает долю найденных документов из эталонной выдачи."""
+    total = sum(len(result) for result in expected)
+    matched = sum(len(set(a) & set(b)) for a, b in zip(expected, found))
+    return matched / total if total else 1.0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Сравнение форматов хранения матрицы TF-IDF"
+    )
+    parser.add_argument("--model", help="zip файл модели вместо синтетического корпуса")
+    parser.add_argument("--docs", type=int, default=300000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top", type=int, nargs="+", default=[5, 15, 50])
+    args = parser.parse_args()
+
+    if args.model:
+        baseline = TfIdfModel()
+        baseline.load(args.model)
+        baseline.set_storage("float64")
+    else:
+        baseline = get_tfidf_model(args.docs)
+    queries = get_queries(baseline.vectorizer.vocabulary, args.queries)
+    expected = {
+        k: [baseline.search_similar(query, k) for query in queries] for k in args.top
+    }
+    base_size = get_matrix_size(baseline)
+
+    header = " ".join(f"{f'recall@{k}':>10}" for k in args.top)
+    print(f"{'storage':>8} {'MB':>8} {'ratio':>6} {header} {'ms':>8}")
+    for storage in ["float64", "float32", "uint8"]:
+        model = deepcopy(baseline)
+        model.set_storage(storage)
+        recalls = " ".join(
+            f"{get_recall(expected[k], [model.search_similar(q, k) for q in queries]):>10.4f}"
+            for k in args.top
+        )
+        size = get_matrix_size(model)
+        latency = measure(model.search_similar, queries, max(args.top))
+        print(
+            f"{storage:>8} {size / 2**20:>8.1f} {size / base_size:>6.2f}"
+            f" {recalls} {latency:>8.2f}"
+        )
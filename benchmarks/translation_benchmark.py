@@ -0,0 +1,101 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+from dataclasses import dataclass, field
+
+from common.processors import LanguageProcessor
+from common.translations import TranslationStore
+
+
+@dataclass
+class FakeTranslator:
+    """Локальный сервис перевода для проверки очереди перевода.
+
+    Attributes:
+        latency (float): время ответа в секундах
+        rate_limit (float): допустимая частота запросов, при превышении
+            возвращается ошибка
+        down (set[str]): недоступные сервисы
+        merge_probability (float): вероятность потери разделителя строк
+    """
+
+    latency: float = 0.05
+    rate_limit: float = 5
+    down: set[str] = field(default_factory=set)
+    merge_probability: float = 0.1
+    requests: int = 0
+    errors: int = 0
+    _last: float = 0
+    _random: random.Random = field(default_factory=lambda: random.Random(0))
+
+    @staticmethod
+    def expected(text: str) -> str:
+        return f"перевод {text}"
+
+    def __call__(self, text: str, service: str) -> str:
+        self.requests += 1
+        now = time.monotonic()
+        too_often = now - self._last < 1 / self.rate_limit
+        self._last = now
+        if service in self.down or too_often:
+            self.errors += 1
+            raise ConnectionError(f"{service}: 429 Too Many Requests")
+        time.sleep(self.latency)
+        lines = [self.expected(line) for line in text.split("\n")]
+        if len(lines) > 1 and self._random.random() < self.merge_probability:
+            # Сервис объединил две строки в одну
+            lines[:2] = [" ".join(lines[:2])]
+        return "\n".join(lines).capitalize()
+
+
+def get_words(n_words: int, n_unique: int, seed: int = 0) -> list[str]:
+    rnd = random.Random(seed)
+    return [f"word{rnd.randrange(n_unique)}" for _ in range(n_words)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Пакетный перевод ключевых слов с локальным сервисом"
+    )
+    parser.add_argument("--words", type=int, default=300)
+    parser.add_argument("--unique", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--rate-limit", type=float, default=5)
+    parser.add_argument("--batch-chars", type=int, default=300)
+    args = parser.parse_args()
+
+    words = get_words(args.words, args.unique)
+    unique = len(set(words))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        translator = FakeTranslator(
+            latency=args.latency, rate_limit=args.rate_limit, down={"bing"}
+        )
+        processor = LanguageProcessor(
+            store=TranslationStore(os.path.join(tmp_dir, "translations.sqlite3")),
+            translate_func=translator,
+        )
+        processor.keywords_queue.max_chars = args.batch_chars
+        start = time.perf_counter()
+        translations = processor.translate_keywords(words)
+        elapsed = time.perf_counter() - start
+        limiter = processor.keywords_queue.limiter
+        processor.store.close()
+
+    # Проверка переводов: все слова переведены и соответствуют исходным
+    mismatches = sum(
+        translation != FakeTranslator.expected(word)
+        for word, translation in zip(words, translations)
+    )
+    print(f"Слов: {len(words)}, уникальных: {unique}, расхождений: {mismatches}")
+    print(
+        f"Запросов: {translator.requests}, ошибок: {translator.errors}, "
+        f"итоговая частота: {limiter.rate:.2f} запросов/с"
+    )
+    # Прежний способ: запрос на каждое слово и 2 секунды ожидания после него
+    print(f"Пакетный перевод: {elapsed:.1f} с")
+    print(f"По одному слову (оценка): {unique * (args.latency + 2):.1f} с")
+
+    if mismatches:
+        raise SystemExit(1)
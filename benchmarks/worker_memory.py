@@ -0,0 +1,149 @@
+import argparse
+import gc
+import os
+import signal
+import tempfile
+from typing import Callable
+
+from benchmarks.func import get_queries, get_tfidf_model
+from ml_models.models import TfIdfModel
+
+
+def get_memory(pid: int) -> dict[str, int]:
+    """Возвращает показатели памяти процесса из smaps_rollup в килобайтах."""
+    memory = {}
+    with open(f"/proc/{pid}/smaps_rollup") as file:
+        for line in file:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                memory[parts[0].rstrip(":")] = int(parts[1])
+    memory["Uss"] = memory.get("Private_Clean", 0) + memory.get("Private_Dirty", 0)
+    return memory
+
+
+def run_workers(
+    load: Callable, warmup: Callable, workers: int, preload: bool
+) -> list[dict[str, int]]:
+    """Запускает рабочие процессы и измеряет их память.
+
+    При preload модели загружаются до fork в главном процессе,
+    иначе каждый рабочий процесс загружает собственную копию.
+    """
+    models = None
+    if preload:
+        models = load()
+        gc.collect()
+        gc.freeze()
+    pids, pipes = [], []
+    for _ in range(workers):
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            worker_models = models if preload else load()
+            warmup(worker_models)
+            gc.collect()
+            os.write(write_fd, b"1")
+            signal.pause()
+            os._exit(0)
+        os.close(write_fd)
+        pids.append(pid)
+        pipes.append(read_fd)
+    for read_fd in pipes:
+        os.read(read_fd, 1)
+        os.close(read_fd)
+    memory = [get_memory(pid) for pid in pids]
+    for pid in pids:
+        os.kill(pid, signal.SIGTERM)
+        os.waitpid(pid, 0)
+    if preload:
+        gc.unfreeze()
+    return memory
+
+
+def get_synthetic_loaders(dirname: str, docs: int, vocab_size: int):
+    """Синтетическая TF-IDF модель: zip-архив до и mmap формат после."""
+    model = get_tfidf_model(docs, vocab_size)
+    zip_file = os.path.join(dirname, "model.zip")
+    mmap_dir = os.path.join(dirname, "model")
+    model.save(zip_file)
+    model.save_mmap(mmap_dir)
+    queries = get_queries(model.vectorizer.vocabulary, number=50)
+
+    def load_zip():
+        tfidf_model = TfIdfModel()
+        tfidf_model.load(zip_file)
+        return tfidf_model
+
+    def load_mmap():
+        tfidf_model = TfIdfModel()
+        tfidf_model.load_mmap(mmap_dir)
+        return tfidf_model
+
+    def warmup(tfidf_model):
+        for query in queries:
+            tfidf_model.search_similar(query, 15)
+
+    return load_zip, load_mmap, warmup
+
+
+def get_app_loaders():
+    """Модели веб-приложения из реестра (требуются файлы моделей)."""
+    from app.main.services import registry
+
+    def load():
+        for entry in registry.entries.values():
+            if entry.preload:
+                registry.get(entry.name)
+        return registry
+
+    def warmup(models):
+        words_processor = models.get("words_processor")
+        search_request = words_processor.process_text("математическая модель")
+        models.get("search_model").search_similar(search_request, 15)
+
+    return load, load, warmup
+
+
+def print_report(title: str, memory: list[dict[str, int]]) -> None:
+    print(title)
+    print(f"{'worker':>8} {'RSS MB':>10} {'PSS MB':>10} {'USS MB':>10}")
+    for i, item in enumerate(memory):
+        print(
+            f"{i:>8} {item['Rss'] / 1024:>10.1f} "
+            f"{item['Pss'] / 1024:>10.1f} {item['Uss'] / 1024:>10.1f}"
+        )
+    total = sum(item["Pss"] for item in memory) / 1024
+    print(f"{'total':>8} {'':>10} {total:>10.1f}\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Память рабочих процессов с загрузкой моделей до и после fork"
+    )
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument(
+        "--source",
+        choices=["synthetic", "app"],
+        default="synthetic",
+        help="синтетическая TF-IDF модель или модели веб-приложения",
+    )
+    parser.add_argument("--docs", type=int, default=100000)
+    parser.add_argument("--vocab", type=int, default=100000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if args.source == "app":
+            load_before, load_after, warmup = get_app_loaders()
+        else:
+            load_before, load_after, warmup = get_synthetic_loaders(
+                tmp_dir, args.docs, args.vocab
+            )
+        print_report(
+            "Загрузка в каждом рабочем процессе",
+            run_workers(load_before, warmup, args.workers, preload=False),
+        )
+        print_report(
+            "Загрузка до fork (preload, mmap, gc.freeze)",
+            run_workers(load_after, warmup, args.workers, preload=True),
+        )
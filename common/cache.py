@@ -0,0 +1,102 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Any, Hashable, Iterable
+
+
+@dataclass
+class LRUCache:
+    """Потокобезопасный кэш с вытеснением давно не использованных записей.
+
+    Attributes:
+        maxsize (int): максимальное количество записей
+        hits (int): количество попаданий в кэш
+        misses (int): количество промахов
+    """
+
+    maxsize: int = 1024
+    hits: int = 0
+    misses: int = 0
+    _data: OrderedDict = field(default_factory=OrderedDict, repr=False)
+    _lock: Lock = field(default_factory=Lock, repr=False)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key not in self._data:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def get_many(self, keys: Iterable[Hashable]) -> dict:
+        """Возвращает найденные в кэше записи для списка ключей."""
+        result = {}
+        with self._lock:
+            for key in keys:
+                if key in self._data:
+                    self.hits += 1
+                    self._data.move_to_end(key)
+                    result[key] = self._data[key]
+                else:
+                    self.misses += 1
+        return result
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+@dataclass
+class TTLCache(LRUCache):
+    """LRU кэш, записи которого устаревают через ttl секунд.
+
+    Attributes:
+        ttl (float): время жизни записи в секундах
+    """
+
+    ttl: float = 300
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        if key not in self:
+            return super().get(key, default)
+        expires, value = super().get(key, (0, default))
+        if expires < time.monotonic():
+            self._expire(key)
+            return default
+        return value
+
+    def get_many(self, keys: Iterable[Hashable]) -> dict:
+        now, result = time.monotonic(), {}
+        for key, (expires, value) in super().get_many(keys).items():
+            if expires >= now:
+                result[key] = value
+            else:
+                self._expire(key)
+        return result
+
+    def _expire(self, key: Hashable) -> None:
+        # Устаревшая запись удаляется и учитывается как промах
+        with self._lock:
+            self._data.pop(key, None)
+            self.hits -= 1
+            self.misses += 1
+
+    def set(self, key: Hashable, value: Any) -> None:
+        super().set(key, (time.monotonic() + self.ttl, value))
@@ -5,7 +5,14 @@ from typing import Any, Mapping, Optional, TypeVar
 from pymongo.collection import Collection
 from pymongo.cursor import Cursor
 from pymongo.database import Database
-from pymongo.results import DeleteResult, InsertOneResult, UpdateResult
+from pymongo.results import (
+    BulkWriteResult,
+    DeleteResult,
+    InsertOneResult,
+    UpdateResult,
+)
+
+from common.metrics import MONGO_REQUESTS
 
 DocumentType = TypeVar("DocumentType", bound=Mapping[str, Any])
 
@@ -45,16 +52,25 @@ class MongoDbRepository(AbstractDBRepository):
         self.collection: Collection = self.mongo_db[self.collection_name]
 
     def list(self, *args, **kwargs) -> Cursor[DocumentType]:
+        MONGO_REQUESTS.inc(operation="find")
         return self.collection.find(*args, **kwargs)
 
     def get(self, query_filter, *args, **kwargs) -> Optional[DocumentType]:
+        MONGO_REQUESTS.inc(operation="find_one")
         return self.collection.find_one(query_filter, *args, **kwargs)
 
     def create(self, document: DocumentType, **kwargs) -> InsertOneResult:
+        MONGO_REQUESTS.inc(operation="insert_one")
         return self.collection.insert_one(document, **kwargs)
 
     def update(self, query_filter, update, **kwargs) -> UpdateResult:
+        MONGO_REQUESTS.inc(operation="update_one")
         return self.collection.update_one(query_filter, update, **kwargs)
 
     def delete(self, query_filter, *args, **kwargs) -> DeleteResult:
+        MONGO_REQUESTS.inc(operation="delete_one")
         return self.collection.delete_one(query_filter, *args, **kwargs)
+
+    def bulk_write(self, requests: list, **kwargs) -> BulkWriteResult:
+        MONGO_REQUESTS.inc(operation="bulk_write")
+        return self.collection.bulk_write(requests, **kwargs)
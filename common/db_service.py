@@ -1,16 +1,22 @@
 import os
 import time
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 from functools import singledispatchmethod, wraps
-from typing import Any, Mapping, Optional
+from typing import Any, Iterable, List, Mapping, Optional, Union
 
+import bson
 from bson import ObjectId
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne
 from pymongo.cursor import Cursor
 from pymongo.database import Database
-from pymongo.errors import ConnectionFailure
-from pymongo.results import DeleteResult, InsertOneResult, UpdateResult
+from pymongo.errors import BulkWriteError, ConnectionFailure
+from pymongo.results import (
+    BulkWriteResult,
+    DeleteResult,
+    InsertOneResult,
+    UpdateResult,
+)
 
 from config import BaseConfig, MongoDBSettings
 from .db_repository import DocumentType, MongoDbRepository
@@ -68,6 +74,25 @@ class MongoDbCrudService:
     def _(self, _id: ObjectId, *args, **kwargs):
         return self.repository.get({"_id": _id}, *args, **kwargs)
 
+    @task_retry_processor()
+    def get_by_ids(
+        self, ids: Iterable[Union[str, ObjectId]], projection=None
+    ) -> List[DocumentType]:
+        """Возвращает документы одним запросом в порядке списка ids.
+
+        Отсутствующие в базе документы пропускаются.
+        """
+        ids = [ObjectId(_id) for _id in ids]
+        if not ids:
+            return []
+        documents = {
+            document["_id"]: document
+            for document in self.repository.list(
+                {"_id": {"$in": ids}}, projection=projection
+            )
+        }
+        return [documents[_id] for _id in ids if _id in documents]
+
     @task_retry_processor()
     def create(self, document, **kwargs) -> InsertOneResult:
         return self.repository.create(document, **kwargs)
@@ -80,6 +105,82 @@ class MongoDbCrudService:
     def delete(self, query_filter, *args, **kwargs) -> DeleteResult:
         return self.repository.delete(query_filter, *args, **kwargs)
 
+    @task_retry_processor()
+    def bulk_write(self, requests: list, **kwargs) -> BulkWriteResult:
+        return self.repository.bulk_write(requests, **kwargs)
+
+
+def get_changed_fields(original: Mapping, document: Mapping) -> dict:
+    """Возвращает поля документа, отличающиеся от исходной записи."""
+    return {
+        key: value
+        for key, value in document.items()
+        if key != "_id" and (key not in original or original[key] != value)
+    }
+
+
+@dataclass
+class BulkWriter:
+    """Пакетная запись изменений документов.
+
+    Операции UpdateOne накапливаются и отправляются одним неупорядоченным
+    запросом bulk_write, когда их количество или размер достигает предела.
+    Повтор при ошибках соединения выполняется сервисом. Ошибки отдельных
+    операций (BulkWriteError) выводятся и учитываются в errors, остальные
+    операции пакета при неупорядоченной записи выполняются.
+
+    Attributes:
+        service (MongoDbCrudService): сервис базы данных
+        max_operations (int): количество операций в пакете
+        max_bytes (int): размер пакета в байтах (BSON)
+        matched (int): количество найденных документов
+        modified (int): количество измененных документов
+        errors (int): количество операций, завершившихся ошибкой
+    """
+
+    service: MongoDbCrudService
+    max_operations: int = BaseConfig.BULK_WRITE_OPERATIONS
+    max_bytes: int = BaseConfig.BULK_WRITE_BYTES
+    matched: int = 0
+    modified: int = 0
+    errors: int = 0
+    _operations: list = field(default_factory=list, repr=False)
+    _size: int = 0
+
+    def update(self, query_filter: Mapping, update: Mapping, **kwargs) -> None:
+        """Добавляет операцию изменения документа в пакет."""
+        self._operations.append(UpdateOne(query_filter, update, **kwargs))
+        self._size += len(bson.encode(query_filter)) + len(bson.encode(update))
+        if len(self._operations) >= self.max_operations or self._size >= self.max_bytes:
+            self.flush()
+
+    def flush(self) -> None:
+        """Отправляет накопленные операции."""
+        if not self._operations:
+            return
+        # Пакет очищается до отправки, чтобы при ошибке он не отправлялся
+        # повторно со следующими операциями
+        operations, self._operations, self._size = self._operations, [], 0
+        try:
+            result = self.service.bulk_write(operations, ordered=False)
+        except BulkWriteError as e:
+            details = e.details
+            self.matched += details.get("nMatched", 0)
+            self.modified += details.get("nModified", 0)
+            for error in details.get("writeErrors", []):
+                self.errors += 1
+                query_filter = error.get("op", {}).get("q")
+                print(f"Bulk write error {query_filter}: {error.get('errmsg')}")
+            return
+        self.matched += result.matched_count
+        self.modified += result.modified_count
+
+    def __enter__(self) -> "BulkWriter":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.flush()
+
 
 def get_mongo_db(
     dbname: str = MongoDBSettings.DB_NAME,
@@ -91,7 +192,11 @@ def get_mongo_db(
 
 
 def get_mongo_db_document_service(
-    mongo_db: Database = get_mongo_db(),
+    mongo_db: Optional[Database] = None,
     collection_name: str = MongoDBSettings.COLLECTION_NAME,
 ) -> MongoDbCrudService:
+    # Клиент создается при вызове, а не при импорте модуля,
+    # чтобы не открывать соединения до fork рабочих процессов
+    if mongo_db is None:
+        mongo_db = get_mongo_db()
     return MongoDbCrudService(repository=MongoDbRepository(mongo_db, collection_name))
@@ -1,4 +1,5 @@
 import string
+from typing import Iterable
 
 import spacy
 from lingua import LanguageDetector, LanguageDetectorBuilder
@@ -29,6 +30,20 @@ def get_nlp_model(name: str = "ru_core_news_lg") -> Language:
     return model
 
 
+def get_query_nlp_model(
+    name: str = "ru_core_news_lg",
+    exclude: Iterable[str] = BaseConfig.QUERY_NLP_EXCLUDE,
+) -> Language:
+    """Возвращает Pipeline SpaCy для поисковых запросов.
+
+    Исключены компоненты, которые не нужны для лемматизации
+    (синтаксический анализ и распознавание сущностей).
+    """
+
+    model = spacy.load(name, exclude=list(exclude))
+    return model
+
+
 def lemmatization(sentence: Doc):
 
     # Лемматизация
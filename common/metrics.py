@@ -0,0 +1,204 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Iterator, Optional
+
+from config import BaseConfig
+
+# Границы интервалов гистограмм времени выполнения (в секундах)
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    labels = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        labels.append(extra)
+    return "{" + ",".join(labels) + "}" if labels else ""
+
+
+@dataclass
+class Counter:
+    """Счетчик с метками в формате Prometheus."""
+
+    name: str
+    description: str
+    labels: tuple = ()
+    _values: dict = field(default_factory=dict, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} counter",
+        ]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labels, key)} {value}")
+        return lines
+
+
+@dataclass
+class Histogram:
+    """Гистограмма с метками в формате Prometheus."""
+
+    name: str
+    description: str
+    labels: tuple = ()
+    buckets: tuple = DEFAULT_BUCKETS
+    _values: dict = field(default_factory=dict, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        with self._lock:
+            state = self._values.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+            index = bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} histogram",
+        ]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    labels = _format_labels(self.labels, key, f'le="{bound}"')
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.labels, key, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{labels} {count}")
+                labels = _format_labels(self.labels, key)
+                lines.append(f"{self.name}_sum{labels} {total}")
+                lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+@dataclass
+class Metrics:
+    """Набор метрик приложения, выводимых в текстовом формате Prometheus.
+
+    Attributes:
+        metrics (list): счетчики и гистограммы
+        caches (dict[str, Callable]): функции, возвращающие кэши (LRUCache),
+            попадания и промахи которых выводятся как счетчики
+    """
+
+    metrics: list = field(default_factory=list)
+    caches: dict[str, Callable[[], Any]] = field(default_factory=dict)
+
+    def counter(self, name: str, description: str, labels: tuple = ()) -> Counter:
+        metric = Counter(name, description, labels)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, description: str, labels: tuple = ()) -> Histogram:
+        metric = Histogram(name, description, labels)
+        self.metrics.append(metric)
+        return metric
+
+    def add_cache(self, name: str, get_cache: Callable[[], Any]) -> None:
+        """Добавляет кэш, статистика которого выводится в метриках."""
+        self.caches[name] = get_cache
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        name = "search_cache_requests_total"
+        lines.append(f"# HELP {name} Обращения к кэшам")
+        lines.append(f"# TYPE {name} counter")
+        for cache_name, get_cache in self.caches.items():
+            cache = get_cache()
+            if cache is None:
+                continue
+            for result, value in (("hit", cache.hits), ("miss", cache.misses)):
+                labels = _format_labels(("cache", "result"), (cache_name, result))
+                lines.append(f"{name}{labels} {value}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+REQUEST_SECONDS = metrics.histogram(
+    "search_request_seconds", "Время обработки запроса", ("endpoint",)
+)
+STAGE_SECONDS = metrics.histogram(
+    "search_stage_seconds", "Время выполнения этапов поиска", ("stage",)
+)
+MONGO_REQUESTS = metrics.counter(
+    "mongo_requests_total", "Запросы к базе данных MongoDB", ("operation",)
+)
+
+# Время этапов текущего запроса (для журнала медленных запросов)
+_local = threading.local()
+
+
+def observe_stage(stage: str, seconds: float) -> None:
+    """Учитывает время выполнения этапа поиска."""
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    breakdown = getattr(_local, "breakdown", None)
+    if breakdown is not None:
+        breakdown[stage] = breakdown.get(stage, 0) + seconds
+
+
+@contextmanager
+def timer(stage: str) -> Iterator[None]:
+    """Измеряет время выполнения этапа поиска."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - start)
+
+
+def start_request() -> dict[str, float]:
+    """Начинает измерение времени обработки запроса.
+
+    Возвращает словарь, в который собирается время этапов, выполненных
+    в потоке запроса.
+    """
+    _local.breakdown, _local.start = {}, time.perf_counter()
+    return _local.breakdown
+
+
+def finish_request(endpoint: str) -> dict[str, float]:
+    """Завершает измерение времени запроса и возвращает время этапов."""
+    breakdown = getattr(_local, "breakdown", None)
+    if breakdown is None:
+        return {}
+    breakdown["total"] = time.perf_counter() - _local.start
+    REQUEST_SECONDS.observe(breakdown["total"], endpoint=endpoint)
+    _local.breakdown = None
+    return breakdown
+
+
+def log_slow_query(
+    query: str,
+    breakdown: dict[str, float],
+    threshold: Optional[float] = BaseConfig.SLOW_QUERY_THRESHOLD,
+) -> None:
+    """Записывает в журнал запрос, выполнявшийся дольше threshold секунд."""
+    if not threshold or breakdown.get("total", 0) < threshold:
+        return
+    stages = {stage: round(seconds, 4) for stage, seconds in breakdown.items()}
+    with open(
+        os.path.join(BaseConfig.LOGS_DIR, "slow_queries.log"), "a", encoding="UTF8"
+    ) as log:
+        log.write(
+            f"{datetime.now().strftime('%d-%m-%Y %H:%M:%S')} "
+            f"{json.dumps({'query': query, 'stages': stages}, ensure_ascii=False)}\n"
+        )
@@ -1,20 +1,26 @@
-import json
 import os
 import re
-import time
 from copy import copy
 from dataclasses import dataclass, field
+from threading import Lock
+from typing import Callable, Optional
 
 import translators as ts
 from gensim.models import KeyedVectors
 from lingua import LanguageDetector
-from requests import HTTPError
 from spacy import Language
-from translators.server import TranslatorError
 
+from common.cache import LRUCache
 from common.func import get_language_detector, lemmatization
+from common.metrics import timer
+from common.translations import (
+    TokenBucket,
+    TranslationError,
+    TranslationQueue,
+    TranslationStore,
+)
 from config import BaseConfig
-from ml_models.models import Word2VecModel
+from ml_models.models import NeighboursTable, Word2VecModel
 
 
 @dataclass
@@ -24,18 +30,39 @@ class LanguageProcessor:
     Attributes:
         target_language (str): язык ("russian", "english" и т.д.)
         language_detector (LanguageDetector): объект определителя языка
-        translations (dict[str, str]): словарь переводов
+        store (TranslationStore): хранилище переводов
+        offline (bool): не обращаться к сервисам перевода, слова без
+            перевода в кэше добавляются в очередь queue_file
+        queue_file (str): файл очереди слов для перевода
+        translate_func (Callable): функция перевода (текст, сервис) -> перевод,
+            по умолчанию используются сервисы translators
     """
 
     target_language: str = "russian"
-    language_detector: LanguageDetector = get_language_detector()
-    translations: dict[str, str] = field(default_factory=dict)
+    language_detector: LanguageDetector = field(default_factory=get_language_detector)
+    store: TranslationStore = field(default_factory=TranslationStore)
+    offline: bool = False
+    queue_file: str = BaseConfig.TRANSLATIONS_QUEUE_FILE
+    translate_func: Optional[Callable[[str, str], str]] = None
+    _queued: set = field(default_factory=set, repr=False)
+    _queue_lock: Lock = field(default_factory=Lock, repr=False)
 
     def __post_init__(self):
-        try:
-            self.load_translations(BaseConfig.TRANSLATIONS_CACHE_FILE)
-        except FileNotFoundError:
-            pass
+        # Перенос переводов из JSON файла прежнего формата
+        if not self.store.count():
+            try:
+                self.store.migrate_json(BaseConfig.TRANSLATIONS_CACHE_FILE)
+            except FileNotFoundError:
+                pass
+        # Очереди перевода слов и текстов с общим ограничением частоты запросов
+        translate_func = self.translate_func or self._translator
+        limiter = TokenBucket()
+        self.keywords_queue = TranslationQueue(
+            translate_func, services=("bing", "yandex", "google"), limiter=limiter
+        )
+        self.texts_queue = TranslationQueue(
+            translate_func, services=("yandex", "bing", "google"), limiter=limiter
+        )
 
     def get_language(self, text: str) -> str:
         """Возвращает язык текста."""
@@ -44,6 +71,11 @@ class LanguageProcessor:
         except AttributeError:
             return ""
 
+    def get_languages(self, texts: list[str]) -> list[str]:
+        """Возвращает языки списка текстов (одним вызовом определителя)."""
+        languages = self.language_detector.detect_languages_in_parallel_of(texts)
+        return [language.name.lower() if language else "" for language in languages]
+
     def _translator(self, text_data, service):
         """Осуществляет перевод."""
 
@@ -51,46 +83,98 @@ class LanguageProcessor:
             text_data,
             translator=service,
             to_language=self.target_language[:2],
-            sleep_seconds=1,
+            sleep_seconds=0,
         )
 
     def translate_keyword(self, word: str):
         """Осуществляет перевод слова или выражения на указанный язык."""
-        word = word.lower()
-        if word not in self.translations:
-            translation = self._translator(word, "bing")
-            print(f"Translation request -> {word}")
-            self.translations[word] = translation.lower()
-            time.sleep(1)
-            return translation
-        return self.translations[word]
+        return self.translate_keywords([word])[0]
+
+    def translate_keywords(self, words: list[str]) -> list[str]:
+        """Переводит список слов на указанный язык.
+
+        Имеющиеся переводы читаются одним запросом, остальные слова
+        переводятся пакетами через очередь перевода.
+        """
+        words = [word.lower() for word in words]
+        translations = self.store.get_keywords(words)
+        missing = [word for word in words if word not in translations]
+        if self.offline and self._queued:
+            # Слова, переведенные задачей предобработки, больше не ожидают
+            with self._queue_lock:
+                self._queued.difference_update(translations)
+        if missing and self.offline:
+            for word in missing:
+                self.queue_translation(word)
+            return [translations.get(word, word) for word in words]
+        if missing:
+            translated = {
+                word: translation.lower()
+                for word, translation in self.keywords_queue.translate(missing).items()
+            }
+            self.store.set_keywords(translated)
+            translations.update(translated)
+            failed = [word for word in missing if word not in translations]
+            if failed:
+                raise TranslationError(f"Not translated: {', '.join(failed[:5])}")
+        return [translations[word] for word in words]
 
     def translate_text(self, text: str):
         """Осуществляет перевод текста на указанный язык."""
-
-        if text:
-            from_language = self.get_language(text)
-            if from_language and from_language != self.target_language:
-                print(f"Translation request -> {text[:25]}")
-                try:
-                    translation = self._translator(text, "yandex")
-                except HTTPError:
-                    translation = self._translator(text, "bing")
-                except TranslatorError:
-                    translation = self._translator(text, "google")
-                return translation
-        return text
-
-    def load_translations(self, filename: str):
-        if os.path.exists(filename):
-            with open(filename, "r", encoding="utf8") as trans_file:
-                self.translations = json.loads(trans_file.read())
-
-    def save_translations(self, filename: str):
-        with open(filename, "w", encoding="utf8") as trans_file:
-            trans_file.write(
-                json.dumps(self.translations, ensure_ascii=False, indent=3)
-            )
+        return self.translate_texts([text])[0]
+
+    def translate_texts(self, texts: list[str]) -> list[str]:
+        """Переводит тексты на другом языке на указанный язык.
+
+        Переводы сохраняются в хранилище по хэшу текста, языки и новые
+        переводы определяются для всех текстов сразу.
+        """
+        unique_texts = list(dict.fromkeys(text for text in texts if text))
+        translations = self.store.get_texts(unique_texts, self.target_language)
+        missing = [text for text in unique_texts if text not in translations]
+        if missing:
+            languages = self.get_languages(missing)
+            foreign = [
+                text
+                for text, language in zip(missing, languages)
+                if language and language != self.target_language
+            ]
+            translated = self.texts_queue.translate(foreign)
+            self.store.set_texts(translated, self.target_language)
+            translations.update(translated)
+            failed = [text for text in foreign if text not in translations]
+            if failed:
+                raise TranslationError(f"Not translated: {failed[0][:25]}")
+        return [translations.get(text, text) for text in texts]
+
+    def is_queued(self, word: str) -> bool:
+        """Проверяет, ожидает ли слово перевода в очереди."""
+        return word in self._queued
+
+    def queue_translation(self, word: str) -> None:
+        """Добавляет слово в очередь перевода задачей предобработки."""
+        with self._queue_lock:
+            if word in self._queued:
+                return
+            self._queued.add(word)
+            with open(self.queue_file, "a", encoding="utf8") as queue_file:
+                queue_file.write(f"{word}\n")
+
+    def take_queue(self) -> list[str]:
+        """Забирает слова из очереди перевода.
+
+        Файл очереди переименовывается перед чтением, поэтому слова,
+        добавленные другими процессами во время обработки, не теряются.
+        """
+        taken_file = f"{self.queue_file}.taken"
+        try:
+            os.replace(self.queue_file, taken_file)
+        except FileNotFoundError:
+            return []
+        with open(taken_file, "r", encoding="utf8") as queue_file:
+            words = [line.strip() for line in queue_file if line.strip()]
+        os.remove(taken_file)
+        return list(dict.fromkeys(words))
 
 
 @dataclass
@@ -139,16 +223,21 @@ class KeywordsProcessor(BaseTextProcessor):
 
     def translate(self, keywords_list: list) -> list:
         """Переводит иностранные слова."""
-        result = []
-        for word in keywords_list:
-            if word:
-                if (
-                    self.lang_processor.get_language(word)
-                    != self.lang_processor.target_language
-                ):
-                    word = self.lang_processor.translate_keyword(word)
-                result.append(word)
-        return result
+        words = [word for word in keywords_list if word]
+        if not words:
+            return []
+        languages = self.lang_processor.get_languages(words)
+        foreign = [
+            i
+            for i, language in enumerate(languages)
+            if language != self.lang_processor.target_language
+        ]
+        translations = self.lang_processor.translate_keywords(
+            [words[i] for i in foreign]
+        )
+        for i, translation in zip(foreign, translations):
+            words[i] = translation
+        return words
 
     def filter_symbols(self, keywords_list: list) -> list:
         """Фильтрует символы и переводит в нижний регистр."""
@@ -193,58 +282,143 @@ class TextProcessor(BaseTextProcessor):
     # Ищет один или более пробельных символа подряд
     RE_SPACES = re.compile(r"\s+")
 
-    def cleanup(self, text: str) -> str:
-        """Очистка текста при помощи регулярных выражений."""
-
-        pipeline = {
-            self.RE_FILTER_TEXT: r" ",
-            self.RE_SINGLE_LETTERS: r" ",
-            self.RE_COMMA_FIX: r", ",
-            self.RE_POINT_FIX: r". ",
-            self.RE_PUNCTUATION_REMOVE: r" ",
-            self.RE_SINGLE_LETTERS: r" ",
-            self.RE_SPACES: r" ",
-        }
-
-        for pattern, repl in pipeline.items():
-            text = re.sub(pattern, repl, text)
+    # Ищет участки текста, которые могут измениться после RE_FILTER_TEXT
+    # (в тексте остаются только буквы "а-яА-Я" и знаки " ,.:-"):
+    # последовательность знаков вместе с однобуквенными словами, кроме
+    # "аАяЯвВсСуУиИкКоО", три и более знака подряд, запятую или точку
+    # перед буквой и двойной пробел. Остальной текст не изменяется.
+    # Все варианты начинаются со знака, что ускоряет поиск.
+    RE_SEGMENT = re.compile(
+        r"""
+        [ ,.:\-]
+        (?:
+            [ ,.:\-]*
+            (?:[бгдежзйлмнпртфхцчшщъыьэюБГДЕЖЗЙЛМНПРТФХЦЧШЩЪЫЬЭЮ][ ,.:\-]+)+
+            | [ ,.:\-]{2,}
+            | [,.](?=[а-яА-Я])
+            | (?<=[,.])(?=[а-яА-Я])
+            | (?<=[ ])[ ]
+        )
+        """,
+        re.VERBOSE,
+    )
+
+    # Шаги очистки в порядке применения. Повторный RE_SINGLE_LETTERS в
+    # словаре прежней реализации перезаписывал первый ключ и отдельным
+    # проходом не выполнялся.
+    PIPELINE = (
+        (RE_FILTER_TEXT, " "),
+        (RE_SINGLE_LETTERS, " "),
+        (RE_COMMA_FIX, ", "),
+        (RE_POINT_FIX, ". "),
+        (RE_PUNCTUATION_REMOVE, " "),
+        (RE_SPACES, " "),
+    )
+
+    # Максимальный размер кэша обработанных участков
+    SEGMENTS_CACHE_SIZE = 10000
+
+    def __post_init__(self):
+        super().__post_init__()
+        # Кэши обработанных участков: за участком нет буквы / есть буква
+        self.segments_cache: tuple[dict[str, str], dict[str, str]] = ({}, {})
+
+    def cleanup_passes(self, text: str) -> str:
+        """Очистка текста последовательными проходами регулярных выражений.
+
+        Используется для сравнения скорости с cleanup.
+        """
+        for pattern, repl in self.PIPELINE:
+            text = pattern.sub(repl, text)
         return text
 
+    def cleanup_segment(self, segment: str, before_word: bool) -> str:
+        """Применяет к участку текста шаги очистки после RE_FILTER_TEXT.
+
+        Участок начинается после буквы (или в начале текста), поэтому шаги
+        зависят только от него самого и от того, следует ли за ним буква.
+        """
+        # Буква после участка нужна для границы слова в RE_COMMA_FIX
+        # и RE_POINT_FIX, в результат она не попадает
+        result = segment + "ж" if before_word else segment
+        for pattern, repl in self.PIPELINE[1:]:
+            result = pattern.sub(repl, result)
+        if before_word:
+            result = result[:-1]
+        cache = self.segments_cache[before_word]
+        if len(cache) >= self.SEGMENTS_CACHE_SIZE:
+            cache.clear()
+        cache[segment] = result
+        return result
+
+    def cleanup(self, text: str) -> str:
+        """Очистка текста при помощи регулярных выражений.
+
+        Выполняется за два прохода: фильтрация символов и замена участков,
+        найденных RE_SEGMENT. Результат проверяется эталонными парами
+        tests/data/cleanup_golden.json.
+        """
+        text = self.RE_FILTER_TEXT.sub(" ", text)
+        length = len(text)
+        caches = self.segments_cache
+
+        def replace(match: re.Match) -> str:
+            before_word = match.end() < length
+            result = caches[before_word].get(match[0])
+            if result is None:
+                result = self.cleanup_segment(match[0], before_word)
+            return result
+
+        return self.RE_SEGMENT.sub(replace, text)
+
 
 @dataclass
 class SearchPrepareProcessor:
     """Класс для добавления предсказанных слов к тексту."""
 
     nlp_model: Language
-    prediction_model: Word2VecModel
-    wiki_model: KeyedVectors
     vocabulary: list
     processor: KeywordsProcessor
+    cache_size: int = BaseConfig.QUERY_CACHE_SIZE
+
+    def __post_init__(self):
+        self.vocabulary_set = set(self.vocabulary)
+        self.lemmas_cache = LRUCache(maxsize=self.cache_size)
+
+    def get_lemmas(self, text: str) -> list[str]:
+        """Возвращает леммы поискового запроса.
+
+        Результат кэшируется по нормализованной строке запроса, кроме
+        запросов со словами, ожидающими перевода: после перевода задачей
+        предобработки такой запрос должен использовать перевод.
+        """
+        text = " ".join(self.processor.filter_letters(text).split())
+        words = self.lemmas_cache.get(text)
+        if words is None:
+            with timer("nlp"):
+                words = lemmatization(self.nlp_model(text))
+            with timer("translate"):
+                words = tuple(self.processor.translate(words))
+            lang_processor = self.processor.lang_processor
+            if not any(lang_processor.is_queued(word) for word in words):
+                self.lemmas_cache.set(text, words)
+        return list(words)
 
     def process_text(self, text: str) -> str:
         """Формирует поисковый запрос."""
-        text = self.processor.filter_letters(text)
-        words = lemmatization(self.nlp_model(text))
-        words = self.processor.translate(words)
-        return " ".join(words)
-
-    def add_similar_words(self, text: str, model: str = "w2v") -> str:
-        """Дополняет поисковый запрос."""
-        words = self.process_text(text).split()
+        return " ".join(self.get_lemmas(text))
+
+    def find_similar_words(
+        self, words: list[str], model: Word2VecModel | KeyedVectors | NeighboursTable
+    ) -> str:
+        """Возвращает слова, близкие к леммам запроса, по указанной модели."""
         addon = []
         for word in copy(words):
-            if word in self.vocabulary:
+            if word in self.vocabulary_set:
                 try:
-                    if model == "wiki":
-                        similar_words = self.wiki_model.most_similar(
-                            word, topn=BaseConfig.AUTOCOMPLETE_SIZE
-                        )
-                    elif model == "w2v":
-                        similar_words = self.prediction_model.most_similar(
-                            word, topn=BaseConfig.AUTOCOMPLETE_SIZE
-                        )
-                    else:
-                        similar_words = None
+                    similar_words = model.most_similar(
+                        word, topn=BaseConfig.AUTOCOMPLETE_SIZE
+                    )
                     addon.extend(
                         [
                             w
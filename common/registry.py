@@ -0,0 +1,197 @@
+import gc
+import os
+import time
+from dataclasses import dataclass, field
+from threading import Lock, Thread
+from typing import Any, Callable, Optional
+
+
+def get_memory_usage() -> int:
+    """Возвращает объем резидентной памяти процесса в байтах."""
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+
+@dataclass
+class ModelEntry:
+    """Запись реестра моделей.
+
+    Attributes:
+        name (str): название модели
+        loader (Callable[[], Any]): функция загрузки модели
+        eager (bool): загружать при запуске в фоновом потоке
+        required (bool): модель необходима для готовности сервиса
+        preload (bool): модель можно загрузить до запуска рабочих процессов
+            (не должна содержать соединений и потоков)
+        status (str): "pending", "loading", "ready" или "error"
+        value (Any): загруженная модель
+        error (Optional[Exception]): ошибка последней загрузки
+        load_time (float): время загрузки в секундах
+        memory (int): прирост памяти процесса при загрузке в байтах
+            (приблизительно, если модели загружаются параллельно)
+    """
+
+    name: str
+    loader: Callable[[], Any]
+    eager: bool = True
+    required: bool = True
+    preload: bool = True
+    status: str = "pending"
+    value: Any = None
+    error: Optional[Exception] = None
+    load_time: float = 0.0
+    memory: int = 0
+    lock: Lock = field(default_factory=Lock, repr=False)
+
+    def info(self) -> dict:
+        return {
+            "status": self.status,
+            "eager": self.eager,
+            "required": self.required,
+            "load_time": round(self.load_time, 3),
+            "memory": self.memory,
+            "error": repr(self.error) if self.error else None,
+        }
+
+
+@dataclass
+class ModelRegistry:
+    """Реестр моделей с отложенной или фоновой загрузкой.
+
+    Модель загружается при первом обращении через get, либо заранее
+    в фоновом потоке после вызова start (для моделей с eager=True).
+    Загрузчики могут обращаться к другим моделям реестра.
+
+    Attributes:
+        entries (dict[str, ModelEntry]): записи реестра
+        on_load (list[Callable[[str, Any], None]]): функции, вызываемые
+            после загрузки или перезагрузки модели
+    """
+
+    entries: dict[str, ModelEntry] = field(default_factory=dict)
+    on_load: list[Callable[[str, Any], None]] = field(default_factory=list)
+
+    def register(
+        self,
+        name: str,
+        loader: Callable[[], Any],
+        eager: bool = True,
+        required: bool = True,
+        preload: bool = True,
+    ) -> None:
+        """Регистрирует модель."""
+        self.entries[name] = ModelEntry(name, loader, eager, required, preload)
+
+    def _load(self, entry: ModelEntry, reload: bool = False) -> None:
+        with entry.lock:
+            if entry.status == "ready" and not reload:
+                return
+            entry.status = "loading"
+            memory, start = get_memory_usage(), time.perf_counter()
+            try:
+                value = entry.loader()
+            except Exception as error:
+                entry.status, entry.error = "error", error
+                print(f"Model '{entry.name}' loading error: {error!r}")
+                raise
+            entry.load_time = time.perf_counter() - start
+            entry.memory = max(get_memory_usage() - memory, 0)
+            entry.value, entry.error, entry.status = value, None, "ready"
+        for callback in self.on_load:
+            callback(entry.name, value)
+
+    def get(self, name: str) -> Any:
+        """Возвращает модель, при необходимости загружая ее.
+
+        Если модель загружается в фоновом потоке, ожидает окончания загрузки.
+        """
+        entry = self.entries[name]
+        if entry.status != "ready":
+            self._load(entry)
+        return entry.value
+
+    def get_nowait(self, name: str) -> Any:
+        """Возвращает модель, если она загружена, иначе None.
+
+        Не ожидает загрузки: если модель еще не загружалась,
+        запускает ее загрузку в фоновом потоке.
+        """
+        entry = self.entries[name]
+        if entry.status == "ready":
+            return entry.value
+        if entry.status == "pending":
+            self._start_loading(entry)
+        return None
+
+    def reload(self, name: str) -> Any:
+        """Перезагружает модель."""
+        entry = self.entries[name]
+        self._load(entry, reload=True)
+        return entry.value
+
+    def _background_load(self, entry: ModelEntry) -> None:
+        try:
+            self._load(entry)
+        except Exception:
+            pass
+
+    def _start_loading(self, entry: ModelEntry) -> Thread:
+        # Повторные вызовы до начала загрузки не запускают новых потоков
+        entry.status = "loading"
+        thread = Thread(
+            target=self._background_load,
+            args=(entry,),
+            name=f"load-{entry.name}",
+            daemon=True,
+        )
+        thread.start()
+        return thread
+
+    def start(self) -> list[Thread]:
+        """Запускает фоновую загрузку моделей с eager=True."""
+        threads = []
+        for entry in self.entries.values():
+            if entry.eager and entry.status == "pending":
+                threads.append(self._start_loading(entry))
+        return threads
+
+    def preload(self) -> None:
+        """Загружает модели в главном процессе до запуска рабочих процессов.
+
+        После загрузки объекты переносятся в постоянное поколение сборщика
+        мусора (gc.freeze), чтобы сборка мусора в рабочих процессах не
+        изменяла их страницы и они оставались общими при копировании
+        при записи. Модели с preload=False загружаются после fork вызовом start.
+        Ошибка загрузки необязательной модели (required=False) сохраняется
+        в записи реестра и не прерывает запуск, как и при фоновой загрузке.
+        """
+        for entry in self.entries.values():
+            if not entry.preload:
+                continue
+            try:
+                self._load(entry)
+            except Exception:
+                if entry.required:
+                    raise
+        gc.collect()
+        gc.freeze()
+
+    def is_ready(self) -> bool:
+        """Проверяет, загружены ли все необходимые модели.
+
+        Необходимые модели, загрузка которых еще не начиналась (например,
+        при отложенной загрузке), начинают загружаться в фоновом потоке:
+        иначе проверка готовности ждала бы первого поискового запроса.
+        """
+        required = [entry for entry in self.entries.values() if entry.required]
+        for entry in required:
+            if entry.status == "pending":
+                self._start_loading(entry)
+        return all(entry.status == "ready" for entry in required)
+
+    def info(self) -> dict:
+        """Состояние, время загрузки и память по каждой модели."""
+        return {name: entry.info() for name, entry in self.entries.items()}
@@ -0,0 +1,103 @@
+import time
+from dataclasses import dataclass, field
+from threading import Event, Lock, Thread
+from typing import Optional
+
+from config import DocumentStatusType
+from .db_service import MongoDbCrudService
+from .metrics import MONGO_REQUESTS
+
+# Поля статусов этапов обработки документа
+STAGES = ["parse_status", "processing_status", "lemmatization_status"]
+
+
+@dataclass
+class CorpusStatsService:
+    """Статистика корпуса документов по статусам этапов обработки.
+
+    Подсчет выполняется одним агрегирующим запросом и хранится в памяти.
+    Обновление происходит в фоновом потоке раз в refresh_interval секунд
+    или по вызову refresh (например, после перезагрузки модели).
+
+    Attributes:
+        db (MongoDbCrudService): сервис базы данных
+        refresh_interval (float): интервал фонового обновления в секундах
+    """
+
+    db: MongoDbCrudService
+    refresh_interval: float = 300
+    _stats: dict = field(default_factory=dict, repr=False)
+    _lock: Lock = field(default_factory=Lock, repr=False)
+    _stop: Event = field(default_factory=Event, repr=False)
+    _thread: Optional[Thread] = field(default=None, repr=False)
+
+    def collect(self) -> dict:
+        """Подсчитывает количество документов по статусам каждого этапа."""
+        pipeline = [
+            {
+                "$group": {
+                    "_id": {stage: f"${stage}" for stage in STAGES},
+                    "count": {"$sum": 1},
+                }
+            }
+        ]
+        stages = {stage: {} for stage in STAGES}
+        documents, total_articles = 0, 0
+        MONGO_REQUESTS.inc(operation="aggregate")
+        for group in self.db.repository.collection.aggregate(pipeline):
+            documents += group["count"]
+            for stage in STAGES:
+                status = group["_id"].get(stage) or "none"
+                stages[stage][status] = stages[stage].get(status, 0) + group["count"]
+            if all(
+                group["_id"].get(stage) == DocumentStatusType.COMPLETED
+                for stage in STAGES
+            ):
+                total_articles += group["count"]
+        return {
+            "documents": documents,
+            "total_articles": total_articles,
+            "stages": stages,
+            "updated_at": time.time(),
+        }
+
+    def refresh(self) -> dict:
+        """Обновляет статистику."""
+        stats = self.collect()
+        with self._lock:
+            self._stats = stats
+        return stats
+
+    @property
+    def stats(self) -> dict:
+        """Текущая статистика (при первом обращении вычисляется)."""
+        if not self._stats:
+            self.refresh()
+        with self._lock:
+            return self._stats
+
+    @property
+    def total_articles(self) -> int:
+        """Количество полностью обработанных статей."""
+        return self.stats["total_articles"]
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.refresh_interval):
+            try:
+                self.refresh()
+            except Exception as error:
+                print(f"Corpus stats refresh error: {error}")
+
+    def start(self) -> None:
+        """Запускает фоновое обновление статистики."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = Thread(target=self._run, name="corpus-stats", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Останавливает фоновое обновление статистики."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,340 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from threading import Lock, local
+from typing import Callable, Iterable
+
+from config import BaseConfig
+
+# Максимальное количество параметров в одном SQL запросе
+SQL_VARIABLES_LIMIT = 900
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS keywords (
+        word TEXT PRIMARY KEY,
+        translation TEXT NOT NULL
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS texts (
+        hash TEXT PRIMARY KEY,
+        translation TEXT NOT NULL
+    ) WITHOUT ROWID
+    """,
+]
+
+
+def get_text_hash(text: str, language: str) -> str:
+    """Ключ перевода текста: хэш содержимого и языка перевода."""
+    return hashlib.sha256(f"{language}\n{text}".encode("utf8")).hexdigest()
+
+
+def chunked(items: list, size: int = SQL_VARIABLES_LIMIT) -> Iterable[list]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+@dataclass
+class TranslationStore:
+    """Хранилище переводов ключевых слов и текстов в SQLite.
+
+    База данных работает в режиме WAL: каждая запись сразу фиксируется
+    в журнале, а чтение из веб-приложения не блокируется записью задачи
+    предобработки. Каждый поток (и процесс после fork) использует свое
+    соединение.
+
+    Attributes:
+        filename (str): файл базы данных
+        timeout (float): время ожидания блокировки записи в секундах
+    """
+
+    filename: str = BaseConfig.TRANSLATIONS_DB_FILE
+    timeout: float = 30
+    _local: local = field(default_factory=local, repr=False)
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Соединение текущего потока."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.filename, timeout=self.timeout)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            with connection:
+                for statement in SCHEMA:
+                    connection.execute(statement)
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def close(self) -> None:
+        """Закрывает соединение текущего потока."""
+        connection = getattr(self._local, "connection", None)
+        if connection is not None and self._local.pid == os.getpid():
+            connection.close()
+        self._local.connection = None
+
+    def _get_many(self, table: str, key: str, keys: list[str]) -> dict[str, str]:
+        result = {}
+        for chunk in chunked(list(dict.fromkeys(keys))):
+            rows = self.connection.execute(
+                f"SELECT {key}, translation FROM {table} "
+                f"WHERE {key} IN ({', '.join('?' * len(chunk))})",
+                chunk,
+            )
+            result.update(rows)
+        return result
+
+    def _set_many(self, table: str, key: str, items: Iterable[tuple]) -> None:
+        with self.connection as connection:
+            connection.executemany(
+                f"INSERT OR REPLACE INTO {table} ({key}, translation) VALUES (?, ?)",
+                items,
+            )
+
+    def get_keyword(self, word: str) -> str | None:
+        """Возвращает перевод ключевого слова."""
+        return self.get_keywords([word]).get(word)
+
+    def get_keywords(self, words: list[str]) -> dict[str, str]:
+        """Возвращает переводы найденных ключевых слов."""
+        return self._get_many("keywords", "word", words)
+
+    def set_keyword(self, word: str, translation: str) -> None:
+        self.set_keywords({word: translation})
+
+    def set_keywords(self, translations: dict[str, str]) -> None:
+        self._set_many("keywords", "word", translations.items())
+
+    def get_text(self, text: str, language: str) -> str | None:
+        """Возвращает перевод текста на указанный язык."""
+        return self.get_texts([text], language).get(text)
+
+    def get_texts(self, texts: list[str], language: str) -> dict[str, str]:
+        """Возвращает найденные переводы текстов на указанный язык."""
+        hashes = {get_text_hash(text, language): text for text in texts}
+        translations = self._get_many("texts", "hash", list(hashes))
+        return {hashes[key]: value for key, value in translations.items()}
+
+    def set_text(self, text: str, language: str, translation: str) -> None:
+        self.set_texts({text: translation}, language)
+
+    def set_texts(self, translations: dict[str, str], language: str) -> None:
+        self._set_many(
+            "texts",
+            "hash",
+            [
+                (get_text_hash(text, language), translation)
+                for text, translation in translations.items()
+            ],
+        )
+
+    def count(self, table: str = "keywords") -> int:
+        """Количество записей в таблице переводов."""
+        return self.connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def migrate_json(self, filename: str) -> int:
+        """Переносит переводы ключевых слов из JSON файла.
+
+        Существующие записи не перезаписываются.
+
+        Returns:
+            int: количество добавленных записей
+        """
+        with open(filename, "r", encoding="utf8") as trans_file:
+            translations = json.loads(trans_file.read())
+        with self.connection as connection:
+            cursor = connection.executemany(
+                "INSERT OR IGNORE INTO keywords (word, translation) VALUES (?, ?)",
+                translations.items(),
+            )
+        return cursor.rowcount
+
+
+class TranslationError(Exception):
+    """Ошибка перевода после всех повторов и резервных сервисов."""
+
+
+@dataclass
+class TokenBucket:
+    """Адаптивное ограничение частоты запросов к сервисам перевода.
+
+    Запросы расходуют токены, которые пополняются со скоростью rate в
+    секунду. После успешного запроса скорость растет на increase, после
+    ошибки уменьшается вдвое (в пределах min_rate - max_rate).
+
+    Attributes:
+        rate (float): текущая скорость (запросов в секунду)
+        min_rate (float): минимальная скорость
+        max_rate (float): максимальная скорость
+        capacity (float): максимальное количество накопленных токенов
+        increase (float): прирост скорости после успешного запроса
+        clock (Callable): источник времени
+        sleep (Callable): функция ожидания
+    """
+
+    rate: float = BaseConfig.TRANSLATION_RATE
+    min_rate: float = BaseConfig.TRANSLATION_MIN_RATE
+    max_rate: float = BaseConfig.TRANSLATION_MAX_RATE
+    capacity: float = 1
+    increase: float = 0.1
+    clock: Callable[[], float] = time.monotonic
+    sleep: Callable[[float], None] = time.sleep
+    _tokens: float | None = field(default=None, repr=False)
+    _updated: float = field(default=0, repr=False)
+    _lock: Lock = field(default_factory=Lock, repr=False)
+
+    def _refill(self) -> None:
+        now = self.clock()
+        if self._tokens is None:
+            self._tokens = self.capacity
+        else:
+            elapsed = now - self._updated
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated = now
+
+    def acquire(self) -> None:
+        """Ожидает токен для запроса."""
+        with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                self.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+    def success(self) -> None:
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def failure(self) -> None:
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+
+
+@dataclass
+class TranslationQueue:
+    """Очередь перевода с объединением запросов.
+
+    Повторяющиеся строки переводятся один раз, строки объединяются через
+    delimiter в запросы до max_chars символов. Если количество строк в
+    ответе не совпадает с запросом, пакет делится пополам. При ошибке
+    запрос повторяется следующим сервисом из services (он же используется
+    первым в следующих запросах), после ошибки всех сервисов - с
+    экспоненциальной задержкой.
+
+    Attributes:
+        translate_func (Callable): функция перевода (текст, сервис) -> перевод
+        services (tuple[str, ...]): сервисы перевода в порядке использования
+        limiter (TokenBucket): ограничение частоты запросов
+        delimiter (str): разделитель строк в запросе
+        max_chars (int): максимальный размер запроса в символах
+        retries (int): количество повторов
+        backoff (float): начальная задержка между повторами в секундах
+        requests (int): количество выполненных запросов
+    """
+
+    translate_func: Callable[[str, str], str]
+    services: tuple[str, ...] = ("yandex", "bing", "google")
+    limiter: TokenBucket = field(default_factory=TokenBucket)
+    delimiter: str = "\n"
+    max_chars: int = BaseConfig.TRANSLATION_BATCH_CHARS
+    retries: int = BaseConfig.TRANSLATION_RETRIES
+    backoff: float = BaseConfig.TRANSLATION_BACKOFF
+    requests: int = 0
+    _pending: dict[str, None] = field(default_factory=dict, repr=False)
+    _lock: Lock = field(default_factory=Lock, repr=False)
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, texts: Iterable[str]) -> None:
+        """Добавляет строки в очередь (без повторов)."""
+        with self._lock:
+            self._pending.update(dict.fromkeys(text for text in texts if text))
+
+    def translate(self, texts: Iterable[str]) -> dict[str, str]:
+        """Переводит строки вместе с ожидающими в очереди."""
+        self.add(texts)
+        return self.flush()
+
+    def flush(self) -> dict[str, str]:
+        """Переводит строки очереди.
+
+        Строки пакета, который не удалось перевести, удаляются из очереди
+        вместе с переведенными и отсутствуют в результате, остальные пакеты
+        переводятся.
+
+        Returns:
+            dict[str, str]: переводы строк очереди
+        """
+        with self._lock:
+            texts = list(self._pending)
+        translations = {}
+        for batch in self.get_batches(texts):
+            try:
+                translations.update(self.translate_batch(batch))
+            except TranslationError as e:
+                print(str(e))
+            finally:
+                with self._lock:
+                    for text in batch:
+                        self._pending.pop(text, None)
+        return translations
+
+    def get_batches(self, texts: list[str]) -> Iterable[list[str]]:
+        """Делит строки на пакеты размером до max_chars символов."""
+        batch, size = [], 0
+        for text in texts:
+            if batch and size + len(text) > self.max_chars:
+                yield batch
+                batch, size = [], 0
+            batch.append(text)
+            size += len(text) + len(self.delimiter)
+        if batch:
+            yield batch
+
+    def translate_batch(self, batch: list[str]) -> dict[str, str]:
+        """Переводит пакет строк одним запросом."""
+        translation = self.request(
+            self.delimiter.join(text.replace(self.delimiter, " ") for text in batch)
+        )
+        parts = translation.strip().split(self.delimiter)
+        if len(parts) == len(batch):
+            return {text: part.strip() for text, part in zip(batch, parts)}
+        if len(batch) == 1:
+            return {batch[0]: translation.strip()}
+        middle = len(batch) // 2
+        return {
+            **self.translate_batch(batch[:middle]),
+            **self.translate_batch(batch[middle:]),
+        }
+
+    def request(self, text: str) -> str:
+        """Выполняет запрос перевода с резервными сервисами и повторами."""
+        error = None
+        for attempt in range(self.retries):
+            if attempt:
+                self.limiter.sleep(self.backoff * 2 ** (attempt - 1))
+            for service in self.services:
+                self.limiter.acquire()
+                self.requests += 1
+                print(f"Translation request ({service}) -> {text[:25]!r}")
+                try:
+                    translation = self.translate_func(text, service)
+                except Exception as e:
+                    print(str(e))
+                    self.limiter.failure()
+                    error = e
+                    continue
+                self.limiter.success()
+                # Работающий сервис используется первым в следующих запросах
+                if service != self.services[0]:
+                    self.services = (service,) + tuple(
+                        other for other in self.services if other != service
+                    )
+                return translation
+        raise TranslationError(f"Translation failed: {error}") from error
@@ -14,12 +14,106 @@ class BaseConfig(object):
     LOGS_DIR = os.path.join(BASEDIR, "logs")
     # Название файла с кешем переводов
     TRANSLATIONS_CACHE_FILE = os.path.join(DATA_DIR, "keyword_translations.json")
+    # Файл базы данных переводов (SQLite), переводы из
+    # TRANSLATIONS_CACHE_FILE переносятся в нее при первом запуске
+    TRANSLATIONS_DB_FILE = os.path.join(DATA_DIR, "translations.sqlite3")
+    # Частота запросов к сервисам перевода (запросов в секунду): начальная,
+    # минимальная и максимальная, подстраивается по ответам сервисов
+    TRANSLATION_RATE = 1.0
+    TRANSLATION_MIN_RATE = 0.1
+    TRANSLATION_MAX_RATE = 5.0
+    # Максимальный размер пакета слов (текстов) в одном запросе перевода
+    TRANSLATION_BATCH_CHARS = 2000
+    # Количество повторов перевода и начальная задержка между ними (секунд)
+    TRANSLATION_RETRIES = 3
+    TRANSLATION_BACKOFF = 2.0
+    # Файл очереди слов для перевода задачей предобработки
+    TRANSLATIONS_QUEUE_FILE = os.path.join(DATA_DIR, "translations_queue.txt")
+    # Не обращаться к сервисам перевода при обработке поисковых запросов
+    QUERY_TRANSLATION_OFFLINE = True
     # Название файла модели TF-IDF
     TF_IDF_MODEL_FILE = os.path.join(DATA_DIR, "tfidf_model.zip")
+    # Директория модели TF-IDF в формате для отображения в память
+    TF_IDF_MMAP_MODEL_DIR = os.path.join(DATA_DIR, "tfidf_model")
+    # Доля удаленных документов, после которой матрица TF-IDF перестраивается
+    TF_IDF_COMPACTION_THRESHOLD = 0.1
+    # Количество блоков матрицы TF-IDF для параллельного поиска
+    TF_IDF_SHARDS = int(os.getenv("TF_IDF_SHARDS", 1))
+    # Пул для поиска по блокам ("thread" или "process")
+    TF_IDF_SHARDS_EXECUTOR = "thread"
+    # Формат хранения весов матрицы TF-IDF ("float64", "float32" или "uint8"),
+    # если не задан - используется формат сохраненной модели
+    TF_IDF_STORAGE = os.getenv("TF_IDF_STORAGE")
+    # Название файла многопольной модели TF-IDF
+    MULTI_FIELD_MODEL_FILE = os.path.join(DATA_DIR, "multi_field_model.zip")
+    # Директория многопольной модели TF-IDF для отображения в память
+    MULTI_FIELD_MMAP_MODEL_DIR = os.path.join(DATA_DIR, "multi_field_model")
+    # Веса полей документа при поиске по многопольной модели
+    FIELD_WEIGHTS = {"text": 1.0, "abstract": 2.0, "keywords": 3.0, "title": 3.0}
+    # Название файла инвертированного индекса
+    INVERTED_INDEX_FILE = os.path.join(DATA_DIR, "inverted_index.zip")
+    # Функция ранжирования инвертированного индекса ("bm25" или "tfidf")
+    INVERTED_INDEX_SCORING = "bm25"
+    # Отсечение документов, которые не могут попасть в выдачу (MaxScore)
+    INVERTED_INDEX_PRUNING = True
     # Название файла модели WORD2VEC
     WORD2VEC_MODEL_FILE = os.path.join(DATA_DIR, "word2vec.model")
     # Название файла модели WORD2VEC Wikipedia
     WIKI_MODEL_FILE = os.path.join(DATA_DIR, "word2vec_wiki.model")
+    # Модель WORD2VEC Wikipedia в формате gensim для отображения в память
+    WIKI_MODEL_KV_FILE = os.path.join(DATA_DIR, "word2vec_wiki.kv")
+    # Загрузка моделей в фоновых потоках при запуске (иначе при первом запросе)
+    MODELS_EAGER_LOADING = bool(int(os.getenv("MODELS_EAGER_LOADING", 1)))
+    # Директории таблиц ближайших слов для дополнения запросов
+    W2V_NEIGHBOURS_DIR = os.path.join(DATA_DIR, "word2vec_neighbours")
+    WIKI_NEIGHBOURS_DIR = os.path.join(DATA_DIR, "word2vec_wiki_neighbours")
+    # Количество ближайших слов в таблице (не меньше AUTOCOMPLETE_SIZE)
+    NEIGHBOURS_TOPN = 10
+    # Загрузка моделей в главном процессе до запуска рабочих процессов
+    PRELOAD_MODELS = bool(int(os.getenv("PRELOAD_MODELS", 0)))
+    # Количество рабочих процессов WSGI сервера
+    WEB_WORKERS = int(os.getenv("WEB_WORKERS", 2))
+    # Интервал обновления статистики корпуса (в секундах)
+    CORPUS_STATS_REFRESH_INTERVAL = 300
+    # Поля статьи, необходимые для вывода результатов поиска
+    ARTICLE_CARD_FIELDS = ["reference", "title", "authors", "year", "magazine"]
+    # Размер кэша карточек статей
+    ARTICLE_CARDS_CACHE_SIZE = 4096
+    # Таймауты необязательных этапов поиска (в секундах), по истечении
+    # которых поиск продолжается без их результата
+    SEARCH_STAGE_TIMEOUTS = {
+        "expand_w2v": 0.5,
+        "expand_wiki": 0.5,
+        "rerank": 1.0,
+        "stats": 1.0,
+    }
+    # Максимальное количество одновременно выполняемых задач одного этапа
+    # поиска, при превышении этап пропускается
+    SEARCH_STAGE_MAX_IN_FLIGHT = 2
+    # Количество потоков для параллельных этапов поиска: задачи одного
+    # этапа не занимают потоки, нужные другим этапам
+    SEARCH_PIPELINE_WORKERS = len(SEARCH_STAGE_TIMEOUTS) * SEARCH_STAGE_MAX_IN_FLIGHT
+    # Порог времени запроса (в секундах) для журнала медленных запросов
+    # logs/slow_queries.log, 0 - журнал отключен
+    SLOW_QUERY_THRESHOLD = float(os.getenv("SLOW_QUERY_THRESHOLD", 0))
+    # Количество результатов, ранжируемых API поиска за один раз
+    API_RESULTS_DEPTH = 100
+    # Максимальное количество результатов и размер страницы API поиска
+    API_MAX_RESULTS = 1000
+    API_MAX_LIMIT = 50
+    # Размер и время жизни (в секундах) кэша результатов API поиска
+    API_RESULTS_CACHE_SIZE = 256
+    API_RESULTS_CACHE_TTL = 600
+    # Директория векторных представлений документов
+    EMBEDDINGS_MODEL_DIR = os.path.join(DATA_DIR, "embeddings")
+    # Количество кластеров индекса IVF
+    ANN_LISTS = 256
+    # Количество просматриваемых кластеров при поиске
+    ANN_N_PROBE = 16
+    # Вес оценки TF-IDF при переранжировании с учетом векторов документов
+    HYBRID_ALPHA = 0.5
+    # Во сколько раз больше кандидатов TF-IDF отбирается для переранжирования
+    HYBRID_CANDIDATES_FACTOR = 5
     # Файл внешнего словаря
     EXT_VOCAB_FILE = os.path.join(DATA_DIR, "external_vocab.txt")
     # Файл внешнего словаря
@@ -30,8 +124,21 @@ class BaseConfig(object):
     VOCABULARY_SIZE = 10000
     # Размер автодополнения поисковых запросов
     AUTOCOMPLETE_SIZE = 1
+    # Компоненты SpaCy, отключаемые при обработке поисковых запросов
+    QUERY_NLP_EXCLUDE = ["parser", "ner"]
+    # Размер кэша лемм поисковых запросов
+    QUERY_CACHE_SIZE = 1024
     # Кол-во результатов поиска
     SEARCH_RESULTS = 5
+    # Количество процессов предобработки статей (1 - без параллельного режима)
+    PREPROCESSING_WORKERS = int(os.getenv("PREPROCESSING_WORKERS", 1))
+    # Количество статей в пакете для рабочего процесса предобработки
+    PREPROCESSING_CHUNK_SIZE = 20
+    # Количество операций и размер (в байтах) пакета записи в базу данных
+    BULK_WRITE_OPERATIONS = 500
+    BULK_WRITE_BYTES = 16 * 1024 * 1024
+    # Поисковый движок ("tfidf", "multi_field" или "inverted_index")
+    SEARCH_ENGINE = os.getenv("SEARCH_ENGINE", "tfidf")
 
 
 class FlaskConfig(object):
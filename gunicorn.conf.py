@@ -0,0 +1,17 @@
+from config import BaseConfig
+
+bind = "0.0.0.0:8000"
+workers = BaseConfig.WEB_WORKERS
+wsgi_app = "wsgi:app"
+# Модели загружаются в главном процессе и разделяются рабочими процессами
+preload_app = BaseConfig.PRELOAD_MODELS
+# Модели загружаются дольше стандартного таймаута
+timeout = 300
+
+
+def post_fork(server, worker):
+    """Запускает в рабочем процессе то, что нельзя создавать до fork."""
+    if server.cfg.preload_app:
+        from app.main.services import registry
+
+        registry.start()
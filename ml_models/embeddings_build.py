@@ -0,0 +1,43 @@
+import os
+
+from common.db_service import get_mongo_db_document_service
+from config import BaseConfig
+from ml_models.func import get_db_list
+from ml_models.models import (
+    ArticlesLemmasIterator,
+    DocumentEmbeddingModel,
+    TfIdfModel,
+    Word2VecModel,
+)
+
+if __name__ == "__main__":
+    db = get_mongo_db_document_service()
+
+    # Словарь и IDF лемм из TF-IDF модели
+    tfidf_model = TfIdfModel()
+    if os.path.isdir(BaseConfig.TF_IDF_MMAP_MODEL_DIR):
+        tfidf_model.load_mmap(BaseConfig.TF_IDF_MMAP_MODEL_DIR)
+    else:
+        tfidf_model.load(BaseConfig.TF_IDF_MODEL_FILE)
+
+    # Векторы лемм из Word2Vec модели
+    w2v_model = Word2VecModel()
+    w2v_model.load(BaseConfig.WORD2VEC_MODEL_FILE)
+
+    # Итератор по леммам
+    lemmas_iterator = ArticlesLemmasIterator(
+        get_db_list(db), ["text", "abstract", "keywords", "title"]
+    )
+
+    # Вычисляем векторы документов и строим индекс IVF
+    embedding_model = DocumentEmbeddingModel()
+    embedding_model.set_word_vectors(
+        tfidf_model.vectorizer.vocabulary,
+        tfidf_model.vectorizer.idf_,
+        w2v_model.model.wv,
+    )
+    embedding_model.fit(
+        lemmas_iterator, n_lists=BaseConfig.ANN_LISTS, show_progress=True
+    )
+    # Сохраняем модель
+    embedding_model.save(BaseConfig.EMBEDDINGS_MODEL_DIR)
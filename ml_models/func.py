@@ -1,8 +1,13 @@
+import os
+import shutil
 from collections import Counter
-from typing import Iterable
+from contextlib import contextmanager
+from typing import Iterable, Iterator
 
+import numpy as np
 from pymongo.cursor import Cursor
-from sklearn.feature_extraction.text import TfidfVectorizer
+from scipy import sparse
+from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
 from tqdm import tqdm
 
 from common.db_repository import DocumentType
@@ -27,14 +32,17 @@ def get_lemmas_count(
     return counter
 
 
-def get_db_list(db: MongoDbCrudService) -> Cursor[DocumentType]:
+def get_db_list(
+    db: MongoDbCrudService, projection: dict | None = None
+) -> Cursor[DocumentType]:
     """Возвращает итератор по полностью обработанным документам."""
     db_list = db.list(
         {
             "parse_status": DocumentStatusType.COMPLETED,
             "processing_status": DocumentStatusType.COMPLETED,
             "lemmatization_status": DocumentStatusType.COMPLETED,
-        }
+        },
+        projection,
     )
     return db_list
 
@@ -45,3 +53,141 @@ def get_tfidf_vectorizer(vocabulary: list[str]) -> TfidfVectorizer:
         encoding="utf-8",
         vocabulary=vocabulary,
     )
+
+
+def get_count_vectorizer(vocabulary: list[str]) -> CountVectorizer:
+    return CountVectorizer(
+        ngram_range=(1, 1),
+        encoding="utf-8",
+        vocabulary=vocabulary,
+    )
+
+
+def get_top_n(scores: np.ndarray, n: int) -> tuple[np.ndarray, np.ndarray]:
+    """Возвращает индексы и значения n наибольших ненулевых оценок.
+
+    Результаты упорядочены по убыванию оценки, при равенстве оценок -
+    по возрастанию индекса, поэтому выдача детерминирована.
+    """
+    candidates = np.flatnonzero(scores > 0)
+    values = scores[candidates]
+    if n <= 0:
+        return candidates[:0], values[:0]
+    if candidates.size > n:
+        # Частичный отбор без полной сортировки массива оценок
+        kth = np.partition(values, candidates.size - n)[candidates.size - n]
+        mask = values > kth
+        equal = np.flatnonzero(values == kth)[: n - np.count_nonzero(mask)]
+        mask[equal] = True
+        candidates, values = candidates[mask], values[mask]
+    order = np.lexsort((candidates, -values))
+    return candidates[order], values[order]
+
+
+def save_arrays(dirname: str, **arrays: np.ndarray) -> None:
+    """Сохраняет массивы в отдельные .npy файлы директории."""
+    os.makedirs(dirname, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(os.path.join(dirname, f"{name}.npy"), array, allow_pickle=False)
+
+
+@contextmanager
+def replace_directory(dirname: str) -> Iterator[str]:
+    """Временная директория рядом с dirname, заменяющая ее после записи.
+
+    Файлы, отображенные в память работающими процессами, не перезаписываются:
+    старая директория переименовывается и удаляется, а открытые отображения
+    продолжают ссылаться на прежние файлы до перезагрузки модели.
+    """
+    dirname = os.path.normpath(dirname)
+    tmp_dirname, old_dirname = f"{dirname}.tmp", f"{dirname}.old"
+    shutil.rmtree(tmp_dirname, ignore_errors=True)
+    os.makedirs(tmp_dirname)
+    try:
+        yield tmp_dirname
+    except BaseException:
+        shutil.rmtree(tmp_dirname, ignore_errors=True)
+        raise
+    shutil.rmtree(old_dirname, ignore_errors=True)
+    if os.path.exists(dirname):
+        os.replace(dirname, old_dirname)
+    os.replace(tmp_dirname, dirname)
+    shutil.rmtree(old_dirname, ignore_errors=True)
+
+
+def load_arrays(
+    dirname: str, names: Iterable[str], mmap_mode: str | None = "r"
+) -> dict[str, np.ndarray]:
+    """Загружает массивы из .npy файлов с отображением в память."""
+    return {
+        name: np.load(
+            os.path.join(dirname, f"{name}.npy"),
+            mmap_mode=mmap_mode,
+            allow_pickle=False,
+        )
+        for name in names
+    }
+
+
+def get_row_shards(
+    matrix: sparse.csr_matrix, n_shards: int
+) -> list[tuple[int, sparse.csr_matrix]]:
+    """Разбивает CSR матрицу на блоки строк с близким числом ненулевых значений.
+
+    Блоки ссылаются на массивы исходной матрицы без копирования данных.
+    Возвращает список пар (номер первой строки блока, блок).
+    """
+    bounds = np.searchsorted(
+        matrix.indptr, np.linspace(0, matrix.nnz, n_shards + 1)[1:-1]
+    )
+    bounds = np.unique(np.concatenate([[0], bounds, [matrix.shape[0]]]))
+    shards = []
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        first, last = matrix.indptr[start], matrix.indptr[end]
+        shard = sparse.csr_matrix(
+            (
+                matrix.data[first:last],
+                matrix.indices[first:last],
+                matrix.indptr[start : end + 1] - first,
+            ),
+            shape=(end - start, matrix.shape[1]),
+            copy=False,
+        )
+        shards.append((int(start), shard))
+    return shards
+
+
+def quantize_rows(matrix: sparse.csr_matrix) -> tuple[sparse.csr_matrix, np.ndarray]:
+    """Квантует веса строк матрицы в uint8 с отдельным масштабом для строки.
+
+    Возвращает квантованную матрицу и масштабы строк: исходный вес
+    приближенно равен произведению квантованного значения на масштаб.
+    """
+    matrix = matrix.tocsr()
+    lengths = np.diff(matrix.indptr)
+    row_max = np.zeros(matrix.shape[0])
+    filled = lengths > 0
+    row_max[filled] = np.maximum.reduceat(
+        np.abs(matrix.data), matrix.indptr[:-1][filled]
+    )
+    scales = row_max / 255
+    data = np.rint(
+        matrix.data / np.repeat(np.where(filled, scales, 1), lengths)
+    ).astype(np.uint8)
+    quantized = sparse.csr_matrix(
+        (data, matrix.indices, matrix.indptr), shape=matrix.shape
+    )
+    quantized.eliminate_zeros()
+    return quantized, scales.astype(np.float32)
+
+
+def shrink_indices(matrix: sparse.csr_matrix | sparse.csc_matrix):
+    """Приводит индексы разреженной матрицы к наименьшему допустимому типу.
+
+    Разреженные матрицы scipy поддерживают только int32 и int64 индексы.
+    """
+    max_value = max(matrix.shape + (matrix.nnz,))
+    index_dtype = np.int32 if max_value <= np.iinfo(np.int32).max else np.int64
+    matrix.indices = matrix.indices.astype(index_dtype, copy=False)
+    matrix.indptr = matrix.indptr.astype(index_dtype, copy=False)
+    return matrix
@@ -0,0 +1,24 @@
+from common.db_service import get_mongo_db_document_service
+from config import BaseConfig
+from ml_models.func import get_db_list
+from ml_models.models import ArticlesLemmasIterator, InvertedIndexModel
+
+if __name__ == "__main__":
+    db = get_mongo_db_document_service()
+
+    # Словарь лем
+    with open(BaseConfig.LEM_VOCAB_FILE, encoding="utf-8") as file:
+        lemmas_vocabulary = [item.strip() for item in file.readlines()]
+
+    # Итератор по леммам
+    lemmas_iterator = ArticlesLemmasIterator(
+        get_db_list(db), ["text", "abstract", "keywords", "title"]
+    )
+
+    # Создаем инвертированный индекс
+    index_model = InvertedIndexModel(
+        vocabulary=lemmas_vocabulary, scoring=BaseConfig.INVERTED_INDEX_SCORING
+    )
+    index_model.fit(lemmas_iterator, show_progress=True)
+    # Сохраняем индекс
+    index_model.save(BaseConfig.INVERTED_INDEX_FILE)
@@ -1,16 +1,36 @@
+import json
+import os
 import pickle
+from collections.abc import Mapping
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from dataclasses import dataclass, field
+from itertools import islice, repeat
+from typing import Iterable
 from zipfile import ZIP_DEFLATED, ZipFile
 
+import numpy as np
 from bson import ObjectId, json_util
 from gensim.models import KeyedVectors, Word2Vec
 from pymongo.cursor import Cursor
 from scipy import sparse
-from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
+from sklearn.preprocessing import normalize
 from tqdm import tqdm
 
 from common.db_repository import DocumentType
+from common.metrics import timer
 from common.models import ArticleDocument
+from ml_models.func import (
+    get_count_vectorizer,
+    get_row_shards,
+    get_tfidf_vectorizer,
+    get_top_n,
+    load_arrays,
+    quantize_rows,
+    replace_directory,
+    save_arrays,
+    shrink_indices,
+)
 
 
 @dataclass
@@ -36,13 +56,79 @@ class ArticlesLemmasIterator:
         return lemmas
 
 
+@dataclass
+class ArticlesFieldsIterator(ArticlesLemmasIterator):
+    """Класс для итерации по леммам полей документов.
+
+    В отличие от ArticlesLemmasIterator возвращает леммы каждого поля
+    отдельно, в порядке lemmas_fields.
+    """
+
+    def __next__(self):
+        article = ArticleDocument(**self.db_list.next())
+        self.objects_ids[self.counter] = article._id
+        self.counter += 1
+        return [article.lemmas.get(key, "") for key in self.lemmas_fields]
+
+
+class ObjectIdsTable(Mapping):
+    """Таблица соответствия строк матрицы и ObjectId документов.
+
+    Хранит идентификаторы в массиве байтов размером (n, 12), который может
+    быть отображен в память, и создает ObjectId только при обращении.
+    """
+
+    def __init__(self, array: np.ndarray):
+        self.array = array
+
+    @classmethod
+    def from_dict(cls, objects_ids: dict[int, ObjectId]) -> "ObjectIdsTable":
+        binary = b"".join(objects_ids[i].binary for i in range(len(objects_ids)))
+        return cls(np.frombuffer(binary, dtype=np.uint8).reshape(-1, 12))
+
+    def __getitem__(self, key: int) -> ObjectId:
+        if not 0 <= key < len(self.array):
+            raise KeyError(key)
+        return ObjectId(self.array[key].tobytes())
+
+    def __iter__(self):
+        return iter(range(len(self.array)))
+
+    def __len__(self) -> int:
+        return len(self.array)
+
+
 @dataclass
 class TfIdfModel:
-    """Класс для работы с TF-IDF моделью."""
+    """Класс для работы с TF-IDF моделью.
+
+    Attributes:
+        vectorizer (TfidfVectorizer): векторизатор с зафиксированным словарем
+        matrix (sparse.csr_matrix): матрица весов TF-IDF документов
+        matrix_objects (dict): соответствие строк матрицы и ObjectId
+        counts (sparse.csr_matrix): частоты слов в документах
+        document_frequency (np.ndarray): количество документов с каждым словом
+        deleted (np.ndarray): отметки удаленных строк матрицы
+        n_shards (int): количество блоков строк для параллельного поиска
+        shard_executor (str): пул для поиска по блокам ("thread" или "process")
+        storage (str): формат весов матрицы ("float64", "float32" или "uint8")
+        row_scales (np.ndarray): масштабы строк квантованной матрицы
+    """
 
     vectorizer: TfidfVectorizer = None
     matrix: sparse.csr_matrix = None
     matrix_objects: dict = field(default_factory=dict)
+    counts: sparse.csr_matrix = None
+    document_frequency: np.ndarray = None
+    deleted: np.ndarray = None
+    n_shards: int = 1
+    shard_executor: str = "thread"
+    storage: str = "float64"
+    row_scales: np.ndarray = None
+    _stale: bool = False
+    _shards: list = field(default=None, repr=False)
+    _shards_source: sparse.csr_matrix = field(default=None, repr=False)
+    _executor: Executor = field(default=None, repr=False)
 
     def fit_and_build_matrix(
         self, data: ArticlesLemmasIterator, show_progress: bool = False
@@ -50,23 +136,317 @@ class TfIdfModel:
         """Обучает модель, создает TfIdf матрицу."""
         if self.vectorizer is None:
             raise ValueError("В модели отсутствует TfidfVectorizer")
-        self.matrix = self.vectorizer.fit_transform(
-            tqdm(data) if show_progress else data
+        self.counts = self._count_documents(tqdm(data) if show_progress else data)
+        self.document_frequency = np.bincount(
+            self.counts.indices, minlength=self.counts.shape[1]
+        )
+        self.deleted = np.zeros(self.counts.shape[0], dtype=bool)
+        self.matrix_objects = dict(data.objects_ids)
+        self._stale = True
+        self.refresh()
+
+    def _get_count_vectorizer(self) -> CountVectorizer:
+        """Возвращает счетчик слов со словарем и анализатором векторизатора."""
+        if self.vectorizer.vocabulary is None:
+            raise ValueError("В TfidfVectorizer отсутствует словарь")
+        return CountVectorizer(
+            analyzer=self.vectorizer.build_analyzer(),
+            vocabulary=self.vectorizer.vocabulary,
+            dtype=np.int32,
+        )
+
+    def _count_documents(self, data) -> sparse.csr_matrix:
+        """Возвращает матрицу частот слов словаря векторизатора."""
+        return self._get_count_vectorizer().transform(data).tocsr()
+
+    def _transform(self, texts: list[str]) -> sparse.csr_matrix:
+        """Возвращает векторы поисковых запросов."""
+        return self.vectorizer.transform(texts).tocsr()
+
+    def _normalize(self, matrix: sparse.csr_matrix) -> sparse.csr_matrix:
+        """Нормализует строки матрицы весов."""
+        if self.vectorizer.norm:
+            matrix = normalize(matrix, norm=self.vectorizer.norm, copy=False)
+        return matrix
+
+    def _get_idf(self) -> np.ndarray:
+        return self.vectorizer.idf_
+
+    def _set_idf(self, idf: np.ndarray) -> None:
+        self.vectorizer.idf_ = idf
+
+    def _get_params(self) -> dict:
+        """Возвращает параметры модели, сохраняемые вместе с матрицей."""
+        return {}
+
+    def _set_params(self, params: dict) -> None:
+        pass
+
+    def append_documents(
+        self, data: ArticlesLemmasIterator, show_progress: bool = False
+    ) -> int:
+        """Добавляет документы в модель без повторного обучения.
+
+        Частоты документов обновляются сразу, а пересчет весов матрицы
+        откладывается до следующего поиска или вызова refresh.
+        """
+        if self.counts is None:
+            raise ValueError("В модели отсутствуют частоты слов")
+        counts = self._count_documents(tqdm(data) if show_progress else data)
+        offset = self.counts.shape[0]
+        self.counts = sparse.vstack([self.counts, counts], format="csr")
+        self.document_frequency += np.bincount(
+            counts.indices, minlength=counts.shape[1]
+        )
+        self.deleted = np.concatenate(
+            [self.deleted, np.zeros(counts.shape[0], dtype=bool)]
         )
-        self.matrix_objects = data.objects_ids
+        for row, _id in data.objects_ids.items():
+            self.matrix_objects[offset + row] = _id
+        self._stale = True
+        return counts.shape[0]
+
+    def delete_documents(self, objects_ids: Iterable[ObjectId]) -> int:
+        """Отмечает документы как удаленные.
+
+        Строки остаются в матрице до вызова compact, но исключаются
+        из частот документов и выдачи поиска.
+        """
+        if self.counts is None:
+            raise ValueError("В модели отсутствуют частоты слов")
+        rows_map = {_id: row for row, _id in self.matrix_objects.items()}
+        rows = [rows_map[_id] for _id in objects_ids if _id in rows_map]
+        rows = np.array([row for row in rows if not self.deleted[row]], dtype=int)
+        if rows.size:
+            removed = self.counts[rows]
+            self.document_frequency -= np.bincount(
+                removed.indices, minlength=removed.shape[1]
+            )
+            self.deleted[rows] = True
+            self._stale = True
+        return rows.size
+
+    def compact(self, threshold: float = 0.1) -> bool:
+        """Удаляет отмеченные строки, если их доля превышает порог."""
+        if self.deleted is None or not self.deleted.any():
+            return False
+        if self.deleted.mean() < threshold:
+            return False
+        keep = np.flatnonzero(~self.deleted)
+        self.counts = self.counts[keep]
+        self.matrix_objects = {
+            row: self.matrix_objects[old_row] for row, old_row in enumerate(keep)
+        }
+        self.deleted = np.zeros(keep.size, dtype=bool)
+        self._stale = True
+        self.refresh()
+        return True
+
+    def refresh(self) -> None:
+        """Пересчитывает IDF и веса матрицы после изменения документов."""
+        if not self._stale:
+            return
+        n_docs = np.count_nonzero(~self.deleted)
+        smooth = int(self.vectorizer.smooth_idf)
+        idf = np.log((n_docs + smooth) / (self.document_frequency + smooth)) + 1
+        matrix = self.counts.astype(np.float64)
+        if self.vectorizer.sublinear_tf:
+            matrix.data = np.log(matrix.data) + 1
+        matrix.data *= idf[matrix.indices]
+        if self.deleted.any():
+            matrix = sparse.diags((~self.deleted).astype(np.float64)) @ matrix
+            matrix.eliminate_zeros()
+        matrix = self._normalize(matrix.tocsr())
+        self._set_idf(idf)
+        self.matrix, self.row_scales = self._compress(matrix)
+        self._stale = False
+
+    def set_storage(self, storage: str) -> None:
+        """Переводит матрицу в указанный формат хранения весов.
+
+        "float32" уменьшает матрицу вдвое без заметной потери точности,
+        "uint8" хранит веса строк в 8 битах с масштабом для каждой строки
+        в формате CSC, поэтому при поиске читаются только столбцы слов запроса.
+        """
+        if storage not in ("float64", "float32", "uint8"):
+            raise ValueError(f"Неизвестный формат хранения {storage}")
+        if storage == "uint8" and self.n_shards > 1:
+            raise ValueError("Поиск по блокам не поддерживает формат uint8")
+        matrix = self._decompress()
+        self.storage = storage
+        self.matrix, self.row_scales = self._compress(matrix)
+
+    def _compress(self, matrix: sparse.csr_matrix) -> tuple:
+        """Возвращает матрицу в формате хранения модели и масштабы строк."""
+        if self.storage == "uint8":
+            matrix, row_scales = quantize_rows(matrix)
+            return shrink_indices(matrix.tocsc()), row_scales
+        dtype = np.float32 if self.storage == "float32" else np.float64
+        return shrink_indices(matrix.tocsr().astype(dtype, copy=False)), None
+
+    def _decompress(self) -> sparse.csr_matrix:
+        """Возвращает матрицу весов в формате float64."""
+        matrix = self.matrix.tocsr().astype(np.float64)
+        if self.row_scales is not None:
+            matrix = sparse.diags(self.row_scales.astype(np.float64)) @ matrix
+        return matrix.tocsr()
+
+    def _score(self, vector: np.ndarray) -> np.ndarray:
+        """Возвращает оценки всех документов для вектора запроса."""
+        if self.storage != "uint8":
+            return self.matrix.dot(vector.astype(self.matrix.dtype, copy=False))
+        # Суммируются только столбцы слов запроса, веса не распаковываются
+        terms = np.flatnonzero(vector)
+        if not terms.size:
+            return np.zeros(self.matrix.shape[0])
+        starts, ends = self.matrix.indptr[terms], self.matrix.indptr[terms + 1]
+        rows = np.concatenate(
+            [self.matrix.indices[start:end] for start, end in zip(starts, ends)]
+        )
+        values = np.concatenate(
+            [
+                self.matrix.data[start:end] * np.float32(vector[term])
+                for start, end, term in zip(starts, ends, terms)
+            ]
+        )
+        scores = np.bincount(rows, weights=values, minlength=self.matrix.shape[0])
+        return scores * self.row_scales
 
     def search_similar(self, search_lemma: str, n: int) -> dict[ObjectId, float]:
         """Находит ближайшие документы."""
         if self.matrix is None:
             raise ValueError("В модели отсутствует Tf-Idf матрица")
-        new_vector = self.vectorizer.transform([search_lemma]).transpose()
-        cos_similarity = self.matrix.dot(new_vector).toarray()
-        sorted_objects = sorted(
-            enumerate(cos_similarity), key=lambda x: x[1], reverse=True
-        )[:n]
-        return {self.matrix_objects[key]: sum(val) for key, val in sorted_objects}
+        self.refresh()
+        with timer("tfidf_vectorize"):
+            new_vector = self._transform([search_lemma]).toarray().ravel()
+        with timer("tfidf_score"):
+            if self.n_shards > 1:
+                rows, scores = self._search_shards(new_vector, n)
+            else:
+                rows, scores = get_top_n(self._score(new_vector), n)
+        return {
+            self.matrix_objects[row]: float(score) for row, score in zip(rows, scores)
+        }
+
+    def split_shards(self, n_shards: int, executor: str = "thread") -> None:
+        """Включает параллельный поиск по n_shards блокам строк матрицы.
+
+        Каждый блок оценивается в отдельном потоке или процессе, лучшие
+        результаты блоков объединяются. Выдача совпадает с поиском по всей
+        матрице.
+        """
+        if executor not in ("thread", "process"):
+            raise ValueError(f"Неизвестный тип пула {executor}")
+        if n_shards > 1 and self.storage == "uint8":
+            raise ValueError("Поиск по блокам не поддерживает формат uint8")
+        self._close_executor()
+        self.n_shards, self.shard_executor = n_shards, executor
+        self._shards = None
+
+    def _get_shards(self) -> list[tuple[int, sparse.csr_matrix]]:
+        """Возвращает блоки строк текущей матрицы."""
+        if self._shards is None or self._shards_source is not self.matrix:
+            self._close_executor()
+            self._shards = get_row_shards(self.matrix.tocsr(), self.n_shards)
+            self._shards_source = self.matrix
+        return self._shards
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.shard_executor == "process":
+                self._executor = ProcessPoolExecutor(
+                    max_workers=len(self._shards),
+                    initializer=_init_search_worker,
+                    initargs=(self,),
+                )
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=len(self._shards))
+        return self._executor
+
+    def __getstate__(self) -> dict:
+        # Пул и блоки строк не передаются в дочерние процессы
+        state = self.__dict__.copy()
+        state.update(_shards=None, _shards_source=None, _executor=None)
+        return state
+
+    def _close_executor(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def _search_shards(
+        self, vector: np.ndarray, n: int
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Находит лучшие строки по всем блокам матрицы параллельно."""
+        shards = self._get_shards()
+        executor = self._get_executor()
+        vector = vector.astype(self.matrix.dtype, copy=False)
+        if self.shard_executor == "process":
+            results = executor.map(
+                _search_shard_worker, range(len(shards)), repeat(vector), repeat(n)
+            )
+        else:
+            results = executor.map(_search_shard, shards, repeat(vector), repeat(n))
+        rows, scores = (np.concatenate(arrays) for arrays in zip(*results))
+        positions, scores = get_top_n(scores, n)
+        return rows[positions], scores
+
+    def search_many(
+        self,
+        queries: list[str],
+        n: int,
+        chunk_size: int = 256,
+        n_jobs: int = 1,
+    ) -> list[dict[ObjectId, float]]:
+        """Находит ближайшие документы для списка запросов.
+
+        Запросы векторизуются одним вызовом, оценки считаются произведением
+        разреженных матриц по частям из chunk_size запросов, что ограничивает
+        объем памяти под промежуточный результат. При n_jobs > 1 части
+        обрабатываются в пуле процессов.
+        """
+        if self.matrix is None:
+            raise ValueError("В модели отсутствует Tf-Idf матрица")
+        self.refresh()
+        vectors = self._transform(queries)
+        chunks = [
+            vectors[start : start + chunk_size]
+            for start in range(0, vectors.shape[0], chunk_size)
+        ]
+        if n_jobs > 1 and len(chunks) > 1:
+            with ProcessPoolExecutor(
+                max_workers=n_jobs,
+                initializer=_init_search_worker,
+                initargs=(self,),
+            ) as executor:
+                results = list(executor.map(_search_chunk_worker, chunks, repeat(n)))
+        else:
+            results = [self._search_chunk(chunk, n) for chunk in chunks]
+        return [
+            {self.matrix_objects[row]: float(score) for row, score in zip(rows, scores)}
+            for chunk_result in results
+            for rows, scores in chunk_result
+        ]
+
+    def _search_chunk(
+        self, vectors: sparse.csr_matrix, n: int
+    ) -> list[tuple[np.ndarray, np.ndarray]]:
+        """Возвращает лучшие строки и оценки для каждого вектора запроса."""
+        # Для формата uint8 scipy распаковывает матрицу на время вычисления
+        similarity = self.matrix.dot(vectors.transpose())
+        if self.row_scales is not None:
+            similarity = sparse.diags(self.row_scales) @ similarity
+        similarity = similarity.tocsc()
+        similarity.sort_indices()
+        result = []
+        for column in range(similarity.shape[1]):
+            start, end = similarity.indptr[column], similarity.indptr[column + 1]
+            positions, scores = get_top_n(similarity.data[start:end], n)
+            result.append((similarity.indices[start:end][positions], scores))
+        return result
 
     def save(self, filename) -> None:
+        self.refresh()
         with ZipFile(
             filename, mode="w", compression=ZIP_DEFLATED, compresslevel=9
         ) as zip_file:
@@ -78,9 +458,22 @@ class TfIdfModel:
                 )
             with zip_file.open("matrix.npz", "w") as matrix_file:
                 sparse.save_npz(matrix_file, self.matrix)
+            if self.row_scales is not None:
+                with zip_file.open("row_scales.npy", "w") as scales_file:
+                    np.save(scales_file, self.row_scales)
+            with zip_file.open("idf.npy", "w") as idf_file:
+                np.save(idf_file, self._get_idf())
+            zip_file.writestr("params.json", json.dumps(self._get_params()))
+            if self.counts is not None:
+                with zip_file.open("counts.npz", "w") as counts_file:
+                    sparse.save_npz(counts_file, self.counts)
+                with zip_file.open("deleted.npy", "w") as deleted_file:
+                    np.save(deleted_file, self.deleted)
             zip_file.writestr(
                 "matrix_objects.json",
-                json_util.dumps(self.matrix_objects, ensure_ascii=False, indent=3),
+                json_util.dumps(
+                    dict(self.matrix_objects), ensure_ascii=False, indent=3
+                ),
             )
 
     def load(self, filename: str) -> None:
@@ -89,6 +482,445 @@ class TfIdfModel:
                 self.vectorizer = pickle.load(vector_file)
             with zip_file.open("matrix.npz") as matrix_file:
                 self.matrix = sparse.load_npz(matrix_file)
+            self.storage, self.row_scales = str(self.matrix.dtype), None
+            if "row_scales.npy" in zip_file.namelist():
+                with zip_file.open("row_scales.npy") as scales_file:
+                    self.row_scales = np.load(scales_file)
+            if "params.json" in zip_file.namelist():
+                with zip_file.open("params.json") as params_file:
+                    self._set_params(json.loads(params_file.read()))
+            if "idf.npy" in zip_file.namelist():
+                with zip_file.open("idf.npy") as idf_file:
+                    self._set_idf(np.load(idf_file))
+            self.counts, self.document_frequency, self.deleted = None, None, None
+            self._stale = False
+            if "counts.npz" in zip_file.namelist():
+                with zip_file.open("counts.npz") as counts_file:
+                    self.counts = sparse.load_npz(counts_file)
+                with zip_file.open("deleted.npy") as deleted_file:
+                    self.deleted = np.load(deleted_file)
+                active = self.counts[np.flatnonzero(~self.deleted)]
+                self.document_frequency = np.bincount(
+                    active.indices, minlength=active.shape[1]
+                )
+            with zip_file.open("matrix_objects.json") as obj_file:
+                data = json_util.loads(obj_file.read())
+                self.matrix_objects = {int(k): v for k, v in data.items()}
+
+    def save_mmap(self, dirname: str) -> None:
+        """Сохраняет модель в несжатом формате для отображения в память.
+
+        Массивы CSR матрицы, таблица ObjectId, словарь и IDF сохраняются
+        в отдельные .npy файлы, параметры матрицы - в meta.json. Файлы
+        записываются во временную директорию, которая затем заменяет
+        dirname, поэтому процессы, использующие модель, не видят частично
+        записанных файлов.
+
+        Блоки строк для поиска по блокам не сохраняются отдельно: в meta.json
+        записывается только n_shards, а при загрузке блоки создаются как
+        срезы отображенных массивов без копирования (см. get_row_shards).
+        Так данные матрицы не дублируются на диске и в кеше ОС, а количество
+        блоков можно изменить без пересохранения модели.
+        """
+        self.refresh()
+        matrix = self.matrix
+        with replace_directory(dirname) as tmp_dirname:
+            save_arrays(
+                tmp_dirname,
+                data=matrix.data,
+                indices=matrix.indices,
+                indptr=matrix.indptr,
+                objects=ObjectIdsTable.from_dict(self.matrix_objects).array,
+                vocabulary=np.array(self.vectorizer.vocabulary, dtype=str),
+                idf=self._get_idf(),
+            )
+            if self.row_scales is not None:
+                save_arrays(tmp_dirname, row_scales=self.row_scales)
+            meta = {
+                "shape": matrix.shape,
+                "format": matrix.format,
+                "storage": self.storage,
+                "n_shards": self.n_shards,
+                "params": self._get_params(),
+            }
+            with open(
+                os.path.join(tmp_dirname, "meta.json"), "w", encoding="utf8"
+            ) as file:
+                file.write(json.dumps(meta))
+
+    def load_mmap(self, dirname: str, mmap_mode: str | None = "r") -> None:
+        """Загружает модель, сохраненную методом save_mmap.
+
+        Массивы не копируются в память процесса, а отображаются из файлов,
+        поэтому страницы разделяются между процессами через кеш ОС.
+        """
+        with open(os.path.join(dirname, "meta.json"), encoding="utf8") as file:
+            meta = json.loads(file.read())
+        arrays = load_arrays(
+            dirname,
+            ["data", "indices", "indptr", "objects", "vocabulary", "idf"],
+            mmap_mode=mmap_mode,
+        )
+        self.vectorizer = get_tfidf_vectorizer(arrays["vocabulary"].tolist())
+        self._set_params(meta.get("params", {}))
+        self._set_idf(np.asarray(arrays["idf"]))
+        matrix_class = (
+            sparse.csc_matrix if meta.get("format") == "csc" else sparse.csr_matrix
+        )
+        self.matrix = matrix_class(
+            (arrays["data"], arrays["indices"], arrays["indptr"]),
+            shape=tuple(meta["shape"]),
+            copy=False,
+        )
+        self.matrix_objects = ObjectIdsTable(arrays["objects"])
+        self.storage, self.row_scales = meta.get("storage", "float64"), None
+        if self.storage == "uint8":
+            scales = load_arrays(dirname, ["row_scales"], mmap_mode=mmap_mode)
+            self.row_scales = scales["row_scales"]
+        self.split_shards(meta.get("n_shards", 1), self.shard_executor)
+        self.counts, self.document_frequency, self.deleted = None, None, None
+        self._stale = False
+
+
+@dataclass
+class MultiFieldTfIdfModel(TfIdfModel):
+    """Класс для работы с TF-IDF моделью по нескольким полям документов.
+
+    Матрица состоит из блоков столбцов, по одному на каждое поле документа.
+    У каждого блока свой IDF, строки нормализуются внутри блока. Вектор
+    запроса повторяется для каждого поля с весом поля, поэтому взвешенная
+    сумма косинусной близости по полям считается одним произведением.
+
+    Attributes:
+        fields (list[str]): поля документа в порядке блоков матрицы
+        field_weights (dict[str, float]): веса полей при поиске
+        field_idf (np.ndarray): IDF всех столбцов матрицы
+        batch_size (int): количество документов в пакете при построении
+    """
+
+    fields: list[str] = field(
+        default_factory=lambda: ["text", "abstract", "keywords", "title"]
+    )
+    field_weights: dict[str, float] = field(default_factory=dict)
+    field_idf: np.ndarray = None
+    batch_size: int = 1000
+
+    def _count_documents(self, data) -> sparse.csr_matrix:
+        """Возвращает матрицу частот слов из блоков по полям за один проход."""
+        count_vectorizer = self._get_count_vectorizer()
+        n_vocab = len(self.vectorizer.vocabulary)
+        batches = []
+        data = iter(data)
+        while batch := list(islice(data, self.batch_size)):
+            batches.append(
+                sparse.hstack(
+                    [
+                        count_vectorizer.transform([doc[i] for doc in batch])
+                        for i in range(len(self.fields))
+                    ],
+                    format="csr",
+                )
+            )
+        if not batches:
+            return sparse.csr_matrix((0, n_vocab * len(self.fields)), dtype=np.int32)
+        return sparse.vstack(batches, format="csr")
+
+    def _normalize(self, matrix: sparse.csr_matrix) -> sparse.csr_matrix:
+        """Нормализует строки матрицы отдельно в блоке каждого поля."""
+        n_fields, n_vocab = len(self.fields), len(self.vectorizer.vocabulary)
+        rows = np.repeat(np.arange(matrix.shape[0]), np.diff(matrix.indptr))
+        blocks = rows * n_fields + matrix.indices // n_vocab
+        norms = np.sqrt(
+            np.bincount(
+                blocks, weights=matrix.data**2, minlength=matrix.shape[0] * n_fields
+            )
+        )
+        matrix.data /= norms[blocks]
+        return matrix
+
+    def _transform(self, texts: list[str]) -> sparse.csr_matrix:
+        """Возвращает векторы запросов, повторенные для блоков полей."""
+        counts = self._get_count_vectorizer().transform(texts).astype(np.float64)
+        if self.vectorizer.sublinear_tf:
+            counts.data = np.log(counts.data) + 1
+        weights = [self.field_weights.get(name, 1.0) for name in self.fields]
+        total = sum(weights) or 1.0
+        idf = self.field_idf.reshape(len(self.fields), -1)
+        blocks = [
+            normalize(counts.multiply(idf[i]).tocsr()) * (weight / total)
+            for i, weight in enumerate(weights)
+        ]
+        return sparse.hstack(blocks, format="csr")
+
+    def _get_idf(self) -> np.ndarray:
+        return self.field_idf
+
+    def _set_idf(self, idf: np.ndarray) -> None:
+        self.field_idf = idf
+
+    def _get_params(self) -> dict:
+        return {"fields": self.fields, "field_weights": self.field_weights}
+
+    def _set_params(self, params: dict) -> None:
+        self.fields = params.get("fields", self.fields)
+        self.field_weights = params.get("field_weights", self.field_weights)
+
+
+# Модель, загруженная в процесс пула search_many
+_search_worker_model: TfIdfModel | None = None
+
+
+def _init_search_worker(model: TfIdfModel) -> None:
+    global _search_worker_model
+    _search_worker_model = model
+
+
+def _search_chunk_worker(
+    vectors: sparse.csr_matrix, n: int
+) -> list[tuple[np.ndarray, np.ndarray]]:
+    return _search_worker_model._search_chunk(vectors, n)
+
+
+def _search_shard(
+    shard: tuple[int, sparse.csr_matrix], vector: np.ndarray, n: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """Находит лучшие строки блока матрицы с учетом его смещения."""
+    offset, matrix = shard
+    rows, scores = get_top_n(matrix.dot(vector), n)
+    return rows + offset, scores
+
+
+def _search_shard_worker(
+    index: int, vector: np.ndarray, n: int
+) -> tuple[np.ndarray, np.ndarray]:
+    return _search_shard(_search_worker_model._get_shards()[index], vector, n)
+
+
+@dataclass
+class PostingsStats:
+    """Статистика обхода списков документов при поиске.
+
+    Attributes:
+        total (int): длина списков документов всех термов запроса
+        evaluated (int): количество оцененных записей списков
+    """
+
+    total: int = 0
+    evaluated: int = 0
+
+    @property
+    def skipped(self) -> int:
+        return self.total - self.evaluated
+
+
+@dataclass
+class InvertedIndexModel:
+    """Класс для работы с инвертированным индексом.
+
+    Для каждого терма словаря хранится список документов, в которых он
+    встречается, и веса терма в этих документах. При поиске оцениваются
+    только документы, содержащие слова запроса.
+
+    Attributes:
+        vocabulary (list[str]): словарь лемм
+        scoring (str): функция ранжирования ("bm25" или "tfidf")
+        k1 (float): параметр насыщения частоты терма BM25
+        b (float): параметр нормализации длины документа BM25
+        postings_ptr (np.ndarray): границы списков документов каждого терма
+        postings_docs (np.ndarray): номера документов
+        postings_weights (np.ndarray): веса терма в документах
+        idf (np.ndarray): обратная частота документов для термов
+        matrix_objects (dict): соответствие номеров документов и ObjectId
+        term_max (np.ndarray): максимальный вес каждого терма в документах
+        pruning (bool): отсекать документы, которые не могут попасть в выдачу
+    """
+
+    vocabulary: list[str] = field(default_factory=list)
+    scoring: str = "bm25"
+    k1: float = 1.2
+    b: float = 0.75
+    postings_ptr: np.ndarray = None
+    postings_docs: np.ndarray = None
+    postings_weights: np.ndarray = None
+    idf: np.ndarray = None
+    matrix_objects: dict = field(default_factory=dict)
+    term_max: np.ndarray = None
+    pruning: bool = True
+
+    def __post_init__(self):
+        if self.scoring not in ("bm25", "tfidf"):
+            raise ValueError(f"Неизвестная функция ранжирования {self.scoring}")
+        self._set_vocabulary(self.vocabulary)
+
+    def _set_vocabulary(self, vocabulary: list[str]) -> None:
+        self.vocabulary = vocabulary
+        self.vocabulary_index = {word: i for i, word in enumerate(vocabulary)}
+        self.analyzer = get_count_vectorizer(vocabulary).build_analyzer()
+
+    def fit(self, data: ArticlesLemmasIterator, show_progress: bool = False) -> None:
+        """Строит индекс по потоку лемм документов."""
+        if not self.vocabulary:
+            raise ValueError("В модели отсутствует словарь")
+        counts = get_count_vectorizer(self.vocabulary).transform(
+            tqdm(data) if show_progress else data
+        )
+        self.build(counts, data.objects_ids)
+
+    def build(self, counts: sparse.csr_matrix, objects_ids: dict) -> None:
+        """Строит индекс по матрице частот слов в документах."""
+        counts = sparse.csr_matrix(counts, dtype=np.float64)
+        n_docs = counts.shape[0]
+        df = np.bincount(counts.indices, minlength=counts.shape[1])
+        if self.scoring == "bm25":
+            self.idf = np.log1p((n_docs - df + 0.5) / (df + 0.5))
+            lengths = np.asarray(counts.sum(axis=1)).ravel()
+            norm = self.k1 * (1 - self.b + self.b * lengths / max(lengths.mean(), 1))
+            tf = counts.data
+            counts.data = (
+                self.idf[counts.indices]
+                * tf
+                * (self.k1 + 1)
+                / (tf + np.repeat(norm, np.diff(counts.indptr)))
+            )
+        else:
+            # Та же схема взвешивания, что и у TfidfVectorizer
+            self.idf = np.log((1 + n_docs) / (1 + df)) + 1
+            counts.data *= self.idf[counts.indices]
+            norms = np.sqrt(np.asarray(counts.multiply(counts).sum(axis=1)).ravel())
+            counts.data /= np.repeat(np.where(norms, norms, 1), np.diff(counts.indptr))
+        postings = counts.tocsc()
+        postings.sort_indices()
+        self.postings_ptr = postings.indptr.astype(np.int64)
+        self.postings_docs = postings.indices.astype(np.int32)
+        self.postings_weights = postings.data.astype(np.float32)
+        self.matrix_objects = objects_ids
+        self._set_term_bounds()
+
+    def _set_term_bounds(self) -> None:
+        """Вычисляет верхние границы весов термов для отсечения документов."""
+        lengths = np.diff(self.postings_ptr)
+        self.term_max = np.zeros(lengths.size, dtype=np.float32)
+        filled = lengths > 0
+        self.term_max[filled] = np.maximum.reduceat(
+            self.postings_weights, self.postings_ptr[:-1][filled]
+        )
+
+    def _query_terms(self, search_lemma: str) -> tuple[np.ndarray, np.ndarray]:
+        """Возвращает номера термов запроса и их веса."""
+        terms = [
+            self.vocabulary_index[word]
+            for word in self.analyzer(search_lemma)
+            if word in self.vocabulary_index
+        ]
+        terms, counts = np.unique(np.array(terms, dtype=np.int64), return_counts=True)
+        weights = counts.astype(np.float64)
+        if self.scoring == "tfidf" and terms.size:
+            weights *= self.idf[terms]
+            weights /= np.linalg.norm(weights)
+        return terms, weights
+
+    def search_similar(self, search_lemma: str, n: int) -> dict[ObjectId, float]:
+        """Находит ближайшие документы."""
+        return self.search_top_k(search_lemma, n)[0]
+
+    def search_top_k(
+        self, search_lemma: str, n: int, pruning: bool | None = None
+    ) -> tuple[dict[ObjectId, float], "PostingsStats"]:
+        """Находит ближайшие документы и возвращает статистику обхода индекса.
+
+        С отсечением (MaxScore) термы обрабатываются по убыванию верхней
+        границы вклада. Как только сумма границ оставшихся термов становится
+        меньше текущего n-го результата, новые документы не рассматриваются:
+        оставшиеся списки проверяются только для уже найденных кандидатов,
+        а кандидаты, не способные превысить порог, отбрасываются. Выдача
+        совпадает с полным обходом списков.
+        """
+        if self.postings_ptr is None:
+            raise ValueError("В модели отсутствует инвертированный индекс")
+        pruning = self.pruning if pruning is None else pruning
+        terms, weights = self._query_terms(search_lemma)
+        bounds = self.term_max[terms] * weights
+        order = np.argsort(-bounds, kind="stable")
+        terms, weights, bounds = terms[order], weights[order], bounds[order]
+        # Максимально возможный вклад термов, начиная с текущего
+        remaining = np.cumsum(bounds[::-1])[::-1]
+        stats = PostingsStats(
+            total=int(np.sum(self.postings_ptr[terms + 1] - self.postings_ptr[terms]))
+        )
+        docs = np.empty(0, dtype=self.postings_docs.dtype)
+        scores = np.empty(0)
+        for i, (term, weight) in enumerate(zip(terms, weights)):
+            start, end = self.postings_ptr[term], self.postings_ptr[term + 1]
+            term_docs = self.postings_docs[start:end]
+            term_values = self.postings_weights[start:end] * weight
+            threshold = 0
+            if scores.size >= n > 0:
+                threshold = np.partition(scores, scores.size - n)[scores.size - n]
+            if pruning and remaining[i] < threshold:
+                keep = scores + remaining[i] >= threshold
+                docs, scores = docs[keep], scores[keep]
+                positions = np.searchsorted(term_docs, docs)
+                positions[positions == term_docs.size] = 0
+                matched = term_docs[positions] == docs
+                scores[matched] += term_values[positions[matched]]
+                stats.evaluated += int(np.count_nonzero(matched))
+            else:
+                docs, inverse = np.unique(
+                    np.concatenate([docs, term_docs]), return_inverse=True
+                )
+                scores = np.bincount(
+                    inverse,
+                    weights=np.concatenate([scores, term_values]),
+                    minlength=docs.size,
+                )
+                stats.evaluated += term_docs.size
+        rows, scores = get_top_n(scores, n)
+        result = {
+            self.matrix_objects[int(docs[row])]: float(score)
+            for row, score in zip(rows, scores)
+        }
+        return result, stats
+
+    def save(self, filename: str) -> None:
+        with ZipFile(filename, mode="w", compression=ZIP_DEFLATED) as zip_file:
+            with zip_file.open("postings.npz", "w") as postings_file:
+                np.savez(
+                    postings_file,
+                    postings_ptr=self.postings_ptr,
+                    postings_docs=self.postings_docs,
+                    postings_weights=self.postings_weights,
+                    idf=self.idf,
+                )
+            zip_file.writestr(
+                "params.json",
+                json.dumps(
+                    {
+                        "vocabulary": self.vocabulary,
+                        "scoring": self.scoring,
+                        "k1": self.k1,
+                        "b": self.b,
+                    },
+                    ensure_ascii=False,
+                ),
+            )
+            zip_file.writestr(
+                "matrix_objects.json",
+                json_util.dumps(self.matrix_objects, ensure_ascii=False, indent=3),
+            )
+
+    def load(self, filename: str) -> None:
+        with ZipFile(filename) as zip_file:
+            with zip_file.open("params.json") as params_file:
+                params = json.loads(params_file.read())
+            self.scoring, self.k1, self.b = params["scoring"], params["k1"], params["b"]
+            self._set_vocabulary(params["vocabulary"])
+            with zip_file.open("postings.npz") as postings_file:
+                with np.load(postings_file) as postings:
+                    self.postings_ptr = postings["postings_ptr"]
+                    self.postings_docs = postings["postings_docs"]
+                    self.postings_weights = postings["postings_weights"]
+                    self.idf = postings["idf"]
+            self._set_term_bounds()
             with zip_file.open("matrix_objects.json") as obj_file:
                 data = json_util.loads(obj_file.read())
                 self.matrix_objects = {int(k): v for k, v in data.items()}
@@ -112,9 +944,13 @@ class Word2VecModel:
         texts = [abstract.split() for abstract in data]
         self.model = Word2Vec(sentences=texts, vector_size=vector_size, **kwargs)
 
-    def load(self, filename: str) -> None:
-        """Загружает модель из файла."""
-        self.model = Word2Vec.load(filename)
+    def load(self, filename: str, mmap: str | None = None) -> None:
+        """Загружает модель из файла.
+
+        При mmap="r" крупные массивы, сохраненные отдельными файлами,
+        отображаются в память и разделяются между процессами.
+        """
+        self.model = Word2Vec.load(filename, mmap=mmap)
 
     def save(self, filename: str) -> None:
         """Сохраняет модель в файл."""
@@ -130,6 +966,339 @@ class Word2VecModel:
         raise ValueError("Отсутствует объект модели Word2Vec.")
 
 
+@dataclass
+class IVFIndex:
+    """Инвертированный индекс по кластерам для приближенного поиска соседей.
+
+    Векторы разбиваются на n_lists кластеров сферическим k-means, при поиске
+    просматриваются только n_probe кластеров с ближайшими центроидами.
+
+    Attributes:
+        centroids (np.ndarray): нормализованные центроиды кластеров
+        list_ptr (np.ndarray): границы списков строк каждого кластера
+        list_rows (np.ndarray): номера строк, упорядоченные по кластерам
+        n_probe (int): количество просматриваемых кластеров
+    """
+
+    centroids: np.ndarray = None
+    list_ptr: np.ndarray = None
+    list_rows: np.ndarray = None
+    n_probe: int = 8
+
+    @staticmethod
+    def _assign(
+        vectors: np.ndarray, centroids: np.ndarray, batch_size: int = 8192
+    ) -> np.ndarray:
+        """Возвращает номер ближайшего центроида для каждого вектора."""
+        return np.concatenate(
+            [
+                np.argmax(vectors[start : start + batch_size] @ centroids.T, axis=1)
+                for start in range(0, len(vectors), batch_size)
+            ]
+            or [np.zeros(0, dtype=np.int64)]
+        )
+
+    def fit(
+        self,
+        embeddings: np.ndarray,
+        n_lists: int,
+        n_iter: int = 10,
+        sample_size: int = 100000,
+        seed: int = 0,
+    ) -> None:
+        """Обучает центроиды на выборке векторов и распределяет строки."""
+        rng = np.random.default_rng(seed)
+        # Нулевые векторы (документы без лемм словаря) не участвуют в обучении
+        rows = np.flatnonzero(np.any(embeddings, axis=1))
+        if not len(rows):
+            rows = np.arange(len(embeddings))
+        sample_size = min(len(rows), sample_size)
+        sample = embeddings[np.sort(rng.choice(rows, sample_size, False))]
+        n_lists = min(n_lists, len(sample))
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+        for _ in range(n_iter):
+            labels = self._assign(sample, centroids)
+            order = np.argsort(labels, kind="stable")
+            sizes = np.bincount(labels, minlength=n_lists)
+            filled = sizes > 0
+            starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+            centroids[filled] = np.add.reduceat(sample[order], starts[filled])
+            norm = np.linalg.norm(centroids, axis=1, keepdims=True)
+            # Пустые и нулевые кластеры получают случайные векторы выборки
+            empty = ~filled | (norm[:, 0] == 0)
+            centroids[empty] = sample[rng.choice(len(sample), np.sum(empty))]
+            norm[empty] = np.linalg.norm(centroids[empty], axis=1, keepdims=True)
+            centroids /= np.where(norm, norm, 1)
+        # Нулевые векторы не попадают в списки: их близость к запросу равна 0
+        rows = np.flatnonzero(np.any(embeddings, axis=1))
+        labels = self._assign(embeddings[rows], centroids)
+        self.centroids = centroids.astype(np.float32)
+        self.list_rows = rows[np.argsort(labels, kind="stable")].astype(np.int32)
+        self.list_ptr = np.concatenate(
+            [[0], np.cumsum(np.bincount(labels, minlength=n_lists))]
+        ).astype(np.int64)
+
+    def search(
+        self, embeddings: np.ndarray, vector: np.ndarray, n: int
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Находит ближайшие строки среди n_probe ближайших кластеров."""
+        probe = np.argsort(-(self.centroids @ vector))[: self.n_probe]
+        rows = np.concatenate(
+            [self.list_rows[self.list_ptr[c] : self.list_ptr[c + 1]] for c in probe]
+        )
+        rows.sort()
+        positions, scores = get_top_n(embeddings[rows] @ vector, n)
+        return rows[positions], scores
+
+
+@dataclass
+class DocumentEmbeddingModel:
+    """Класс для работы с векторными представлениями документов.
+
+    Вектор документа - среднее векторов Word2Vec его лемм, взвешенное
+    по IDF и частоте леммы, нормализованное к единичной длине.
+
+    Attributes:
+        vocabulary (list[str]): словарь лемм
+        idf (np.ndarray): IDF лемм словаря
+        word_vectors (np.ndarray): векторы лемм словаря
+        embeddings (np.ndarray): векторы документов (float32)
+        matrix_objects (dict): соответствие строк и ObjectId документов
+        ivf (IVFIndex): индекс для приближенного поиска
+    """
+
+    vocabulary: list[str] = field(default_factory=list)
+    idf: np.ndarray = None
+    word_vectors: np.ndarray = None
+    embeddings: np.ndarray = None
+    matrix_objects: dict = field(default_factory=dict)
+    ivf: IVFIndex = None
+
+    def __post_init__(self):
+        self.objects_rows = {}
+
+    def set_word_vectors(
+        self, vocabulary: list[str], idf: np.ndarray, keyed_vectors: KeyedVectors
+    ) -> None:
+        """Задает словарь, IDF и векторы лемм из модели Word2Vec."""
+        self.vocabulary, self.idf = list(vocabulary), np.asarray(idf)
+        self.word_vectors = np.zeros(
+            (len(vocabulary), keyed_vectors.vector_size), dtype=np.float32
+        )
+        for i, word in enumerate(self.vocabulary):
+            if word in keyed_vectors.key_to_index:
+                self.word_vectors[i] = keyed_vectors[word]
+
+    def _embed(self, texts) -> np.ndarray:
+        """Возвращает нормализованные векторы текстов."""
+        counts = get_count_vectorizer(self.vocabulary).transform(texts)
+        vectors = np.asarray(counts.multiply(self.idf).tocsr() @ self.word_vectors)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return (vectors / np.where(norms, norms, 1)).astype(np.float32)
+
+    def fit(
+        self,
+        data: ArticlesLemmasIterator,
+        n_lists: int = 0,
+        show_progress: bool = False,
+    ) -> None:
+        """Вычисляет векторы документов и строит индекс IVF."""
+        if self.word_vectors is None:
+            raise ValueError("В модели отсутствуют векторы лемм")
+        self.embeddings = self._embed(tqdm(data) if show_progress else data)
+        self.matrix_objects = dict(data.objects_ids)
+        self.objects_rows = {_id: row for row, _id in self.matrix_objects.items()}
+        self.ivf = None
+        if n_lists:
+            self.ivf = IVFIndex()
+            self.ivf.fit(self.embeddings, n_lists)
+
+    def search_similar(
+        self, search_lemma: str, n: int, exact: bool = False
+    ) -> dict[ObjectId, float]:
+        """Находит ближайшие документы по косинусной близости векторов."""
+        if self.embeddings is None:
+            raise ValueError("В модели отсутствуют векторы документов")
+        vector = self._embed([search_lemma])[0]
+        if self.ivf is None or exact:
+            rows, scores = get_top_n(self.embeddings @ vector, n)
+        else:
+            rows, scores = self.ivf.search(self.embeddings, vector, n)
+        return {
+            self.matrix_objects[int(row)]: float(score)
+            for row, score in zip(rows, scores)
+        }
+
+    def rerank(
+        self,
+        search_lemma: str,
+        candidates: dict[ObjectId, float],
+        n: int,
+        alpha: float = 0.5,
+    ) -> dict[ObjectId, float]:
+        """Переранжирует найденные документы с учетом близости векторов.
+
+        Итоговая оценка - alpha * исходная оценка + (1 - alpha) * косинусная
+        близость векторов запроса и документа. Исходные оценки приводятся
+        к диапазону 0-1 (min-max), так как оценки BM25 не ограничены.
+        """
+        vector = self._embed([search_lemma])[0]
+        objects = list(candidates)
+        rows = np.array([self.objects_rows.get(_id, -1) for _id in objects])
+        known = rows >= 0
+        semantic = np.zeros(len(objects))
+        if known.any():
+            semantic[known] = self.embeddings[rows[known]] @ vector
+        original = np.array(list(candidates.values()), dtype=np.float64)
+        if len(original):
+            low, high = original.min(), original.max()
+            original = (
+                (original - low) / (high - low)
+                if high > low
+                else np.ones_like(original)
+            )
+        combined = alpha * original + (1 - alpha) * semantic
+        positions, scores = get_top_n(combined, n)
+        return {objects[i]: float(score) for i, score in zip(positions, scores)}
+
+    def save(self, dirname: str) -> None:
+        # Директория заменяется целиком, так как файлы отображаются в память
+        with replace_directory(dirname) as tmp_dirname:
+            save_arrays(
+                tmp_dirname,
+                vocabulary=np.array(self.vocabulary, dtype=str),
+                idf=self.idf,
+                word_vectors=self.word_vectors,
+                embeddings=self.embeddings,
+                objects=ObjectIdsTable.from_dict(self.matrix_objects).array,
+            )
+            if self.ivf is not None:
+                save_arrays(
+                    tmp_dirname,
+                    centroids=self.ivf.centroids,
+                    list_ptr=self.ivf.list_ptr,
+                    list_rows=self.ivf.list_rows,
+                )
+
+    def load(self, dirname: str, mmap_mode: str | None = "r") -> None:
+        arrays = load_arrays(
+            dirname,
+            ["vocabulary", "idf", "word_vectors", "embeddings", "objects"],
+            mmap_mode=mmap_mode,
+        )
+        self.vocabulary = arrays["vocabulary"].tolist()
+        self.idf, self.word_vectors = arrays["idf"], arrays["word_vectors"]
+        self.embeddings = arrays["embeddings"]
+        self.matrix_objects = ObjectIdsTable(arrays["objects"])
+        self.objects_rows = {_id: row for row, _id in self.matrix_objects.items()}
+        self.ivf = None
+        if os.path.exists(os.path.join(dirname, "centroids.npy")):
+            arrays = load_arrays(
+                dirname, ["centroids", "list_ptr", "list_rows"], mmap_mode=mmap_mode
+            )
+            self.ivf = IVFIndex(
+                arrays["centroids"], arrays["list_ptr"], arrays["list_rows"]
+            )
+
+
+@dataclass
+class NeighboursTable:
+    """Таблица заранее вычисленных ближайших слов для лемм словаря.
+
+    Заменяет полный перебор векторов модели в most_similar на поиск по
+    таблице. Соседи хранятся номерами в массиве labels, так как могут
+    не входить в словарь.
+
+    Attributes:
+        words (np.ndarray): леммы, для которых вычислены соседи
+        labels (np.ndarray): слова, встречающиеся среди соседей
+        neighbours (np.ndarray): номера соседей в labels (по убыванию близости)
+        similarities (np.ndarray): косинусная близость соседей
+    """
+
+    words: np.ndarray = None
+    labels: np.ndarray = None
+    neighbours: np.ndarray = None
+    similarities: np.ndarray = None
+
+    def __post_init__(self):
+        self.words_rows = {}
+        if self.words is not None:
+            self.words_rows = {word: row for row, word in enumerate(self.words)}
+
+    def build(
+        self,
+        vocabulary: Iterable[str],
+        keyed_vectors: KeyedVectors,
+        topn: int = 10,
+        batch_size: int = 128,
+        show_progress: bool = False,
+    ) -> None:
+        """Вычисляет topn ближайших слов модели для каждой леммы словаря.
+
+        Близость и исключение самого слова совпадают с
+        KeyedVectors.most_similar.
+        """
+        vectors = keyed_vectors.get_normed_vectors()
+        words = [word for word in vocabulary if word in keyed_vectors.key_to_index]
+        keys = np.array([keyed_vectors.key_to_index[word] for word in words])
+        neighbours = np.zeros((len(words), topn), dtype=np.int64)
+        similarities = np.zeros((len(words), topn), dtype=np.float32)
+        batches = range(0, len(words), batch_size)
+        for start in tqdm(batches) if show_progress else batches:
+            batch = keys[start : start + batch_size]
+            scores = vectors[batch] @ vectors.T
+            scores[np.arange(len(batch)), batch] = -np.inf
+            top = np.argpartition(-scores, topn, axis=1)[:, :topn]
+            top_scores = np.take_along_axis(scores, top, axis=1)
+            order = np.argsort(-top_scores, axis=1, kind="stable")
+            neighbours[start : start + len(batch)] = np.take_along_axis(
+                top, order, axis=1
+            )
+            similarities[start : start + len(batch)] = np.take_along_axis(
+                top_scores, order, axis=1
+            )
+        # Переходим от номеров модели к компактному списку слов-соседей
+        used, neighbours = np.unique(neighbours, return_inverse=True)
+        self.words = np.array(words, dtype=str)
+        self.labels = np.array([keyed_vectors.index_to_key[i] for i in used], dtype=str)
+        self.neighbours = neighbours.reshape(-1, topn).astype(np.int32)
+        self.similarities = similarities
+        self.__post_init__()
+
+    def most_similar(self, word: str, topn: int = 5) -> list[tuple[str, float]]:
+        """Возвращает ближайшие слова (KeyError, если слова нет в таблице)."""
+        row = self.words_rows[word]
+        return [
+            (str(self.labels[i]), float(similarity))
+            for i, similarity in zip(
+                self.neighbours[row, :topn], self.similarities[row, :topn]
+            )
+        ]
+
+    def save(self, dirname: str) -> None:
+        # Директория заменяется целиком, так как файлы отображаются в память
+        with replace_directory(dirname) as tmp_dirname:
+            save_arrays(
+                tmp_dirname,
+                words=self.words,
+                labels=self.labels,
+                neighbours=self.neighbours,
+                similarities=self.similarities,
+            )
+
+    def load(self, dirname: str, mmap_mode: str | None = "r") -> None:
+        arrays = load_arrays(
+            dirname,
+            ["words", "labels", "neighbours", "similarities"],
+            mmap_mode=mmap_mode,
+        )
+        self.words, self.labels = arrays["words"], arrays["labels"]
+        self.neighbours = arrays["neighbours"]
+        self.similarities = arrays["similarities"]
+        self.__post_init__()
+
+
 # @dataclass
 # class KeyedVectorsModel:
 #     """Класс для работы с Word2Vec моделью."""
@@ -144,4 +1313,4 @@ class Word2VecModel:
 #         """Метод нахождения ближайших слов."""
 #         if self.model is not None:
 #             return self.model.most_similar(word, topn=qty)
-#         raise ValueError("Отсутствует объект модели Word2Vec.")
\ No newline at end of file
+#         raise ValueError("Отсутствует объект модели Word2Vec.")
@@ -0,0 +1,26 @@
+from common.db_service import get_mongo_db_document_service
+from config import BaseConfig
+from ml_models.func import get_db_list, get_tfidf_vectorizer
+from ml_models.models import ArticlesFieldsIterator, MultiFieldTfIdfModel
+
+if __name__ == "__main__":
+    db = get_mongo_db_document_service()
+
+    # Словарь лем
+    with open(BaseConfig.LEM_VOCAB_FILE, encoding="utf-8") as file:
+        lemmas_vocabulary = [item.strip() for item in file.readlines()]
+
+    # Итератор по леммам полей документов
+    fields = list(BaseConfig.FIELD_WEIGHTS)
+    fields_iterator = ArticlesFieldsIterator(get_db_list(db), fields)
+
+    # Создаем и обучаем многопольную TF-IDF модель за один проход
+    tfidf_model = MultiFieldTfIdfModel(
+        vectorizer=get_tfidf_vectorizer(vocabulary=lemmas_vocabulary),
+        fields=fields,
+        field_weights=BaseConfig.FIELD_WEIGHTS,
+    )
+    tfidf_model.fit_and_build_matrix(fields_iterator, show_progress=True)
+    # Сохраняем модель
+    tfidf_model.save(BaseConfig.MULTI_FIELD_MODEL_FILE)
+    tfidf_model.save_mmap(BaseConfig.MULTI_FIELD_MMAP_MODEL_DIR)
@@ -0,0 +1,41 @@
+import os
+
+from gensim.models import KeyedVectors
+
+from config import BaseConfig
+from ml_models.models import NeighboursTable, TfIdfModel, Word2VecModel
+
+if __name__ == "__main__":
+    # Словарь лемм из TF-IDF модели (дополняются только слова словаря)
+    tfidf_model = TfIdfModel()
+    if os.path.isdir(BaseConfig.TF_IDF_MMAP_MODEL_DIR):
+        tfidf_model.load_mmap(BaseConfig.TF_IDF_MMAP_MODEL_DIR)
+    else:
+        tfidf_model.load(BaseConfig.TF_IDF_MODEL_FILE)
+    vocabulary = tfidf_model.vectorizer.vocabulary
+
+    # Таблица ближайших слов модели Word2Vec
+    w2v_model = Word2VecModel()
+    w2v_model.load(BaseConfig.WORD2VEC_MODEL_FILE)
+    w2v_neighbours = NeighboursTable()
+    w2v_neighbours.build(
+        vocabulary,
+        w2v_model.model.wv,
+        topn=BaseConfig.NEIGHBOURS_TOPN,
+        show_progress=True,
+    )
+    w2v_neighbours.save(BaseConfig.W2V_NEIGHBOURS_DIR)
+
+    # Таблица ближайших слов модели Wikipedia
+    if os.path.exists(BaseConfig.WIKI_MODEL_KV_FILE):
+        wiki_model = KeyedVectors.load(BaseConfig.WIKI_MODEL_KV_FILE, mmap="r")
+    else:
+        wiki_model = KeyedVectors.load_word2vec_format(BaseConfig.WIKI_MODEL_FILE)
+    wiki_neighbours = NeighboursTable()
+    wiki_neighbours.build(
+        vocabulary,
+        wiki_model,
+        topn=BaseConfig.NEIGHBOURS_TOPN,
+        show_progress=True,
+    )
+    wiki_neighbours.save(BaseConfig.WIKI_NEIGHBOURS_DIR)
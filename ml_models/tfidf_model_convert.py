@@ -0,0 +1,11 @@
+from config import BaseConfig
+from ml_models.models import TfIdfModel
+
+if __name__ == "__main__":
+    # Загружаем модель из zip архива
+    tfidf_model = TfIdfModel()
+    tfidf_model.load(BaseConfig.TF_IDF_MODEL_FILE)
+    # Переводим веса в компактный формат хранения
+    tfidf_model.set_storage(BaseConfig.TF_IDF_STORAGE or tfidf_model.storage)
+    # Сохраняем модель в формате для отображения в память
+    tfidf_model.save_mmap(BaseConfig.TF_IDF_MMAP_MODEL_DIR)
@@ -21,3 +21,4 @@ if __name__ == "__main__":
     tfidf_model.fit_and_build_matrix(lemmas_iterator, show_progress=True)
     # Сохраняем модель
     tfidf_model.save(BaseConfig.TF_IDF_MODEL_FILE)
+    tfidf_model.save_mmap(BaseConfig.TF_IDF_MMAP_MODEL_DIR)
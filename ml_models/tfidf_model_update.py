@@ -0,0 +1,45 @@
+from common.db_service import get_mongo_db_document_service
+from config import BaseConfig, DocumentStatusType
+from ml_models.func import get_db_list
+from ml_models.models import ArticlesLemmasIterator, TfIdfModel
+
+if __name__ == "__main__":
+    db = get_mongo_db_document_service()
+
+    # Загружаем ранее обученную модель
+    tfidf_model = TfIdfModel()
+    tfidf_model.load(BaseConfig.TF_IDF_MODEL_FILE)
+    if tfidf_model.counts is None:
+        # Модели, сохраненные до добавления частот слов, обновлять нельзя
+        raise SystemExit(
+            f"В модели {BaseConfig.TF_IDF_MODEL_FILE} отсутствуют частоты слов: "
+            "переобучите ее с помощью tfidf_model_train.py"
+        )
+    indexed_ids = set(tfidf_model.matrix_objects.values())
+
+    # Документы, лемматизация которых завершена после построения модели
+    new_ids = [
+        record["_id"]
+        for record in get_db_list(db, {"_id": 1})
+        if record["_id"] not in indexed_ids
+    ]
+    if new_ids:
+        lemmas_iterator = ArticlesLemmasIterator(
+            db.list({"_id": {"$in": new_ids}}),
+            ["text", "abstract", "keywords", "title"],
+        )
+        added = tfidf_model.append_documents(lemmas_iterator, show_progress=True)
+        print(f"Добавлено документов: {added}")
+
+    # Документы, отмеченные как удаленные
+    deleted = tfidf_model.delete_documents(
+        record["_id"]
+        for record in db.list({"parse_status": DocumentStatusType.DELETE}, {"_id": 1})
+    )
+    print(f"Удалено документов: {deleted}")
+    if tfidf_model.compact(BaseConfig.TF_IDF_COMPACTION_THRESHOLD):
+        print("Матрица перестроена")
+
+    # Сохраняем модель
+    tfidf_model.save(BaseConfig.TF_IDF_MODEL_FILE)
+    tfidf_model.save_mmap(BaseConfig.TF_IDF_MMAP_MODEL_DIR)
@@ -0,0 +1,10 @@
+from gensim.models import KeyedVectors
+
+from config import BaseConfig
+
+if __name__ == "__main__":
+    # Загружаем модель Wikipedia в текстовом формате word2vec
+    wiki_model = KeyedVectors.load_word2vec_format(BaseConfig.WIKI_MODEL_FILE)
+    # Сохраняем в формате gensim (векторы отдельным .npy файлом),
+    # который загружается с mmap="r" без разбора текста
+    wiki_model.save(BaseConfig.WIKI_MODEL_KV_FILE, sep_limit=0)
@@ -1,6 +1,14 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
 from tqdm import tqdm
 
-from common.db_service import get_mongo_db_document_service
+from common.db_service import (
+    BulkWriter,
+    get_changed_fields,
+    get_mongo_db_document_service,
+)
 from common.models import ArticleDocument
 from common.processors import (
     AbstractProcessor,
@@ -10,10 +18,8 @@ from common.processors import (
 )
 from config import BaseConfig, DocumentStatusType
 
-# Языковой процессор
+# Языковой процессор (переводы сохраняются в хранилище сразу)
 language_processor = LanguageProcessor(target_language="russian")
-# Кэш ранее сделанных переводов
-language_processor.load_translations(BaseConfig.TRANSLATIONS_CACHE_FILE)
 # Процессор ключевых слов
 keywords_processor = KeywordsProcessor(lang_processor=language_processor)
 # Процессор аннотаций
@@ -21,44 +27,184 @@ abstract_processor = AbstractProcessor()
 # Процессор текстов статей
 articles_processor = TextProcessor()
 
+# Поля, необходимые для предобработки в параллельном режиме
+PROJECTION = ["reference", "language", "keywords", "abstract", "text"]
+
+
+def process_translations_queue():
+    """Переводит слова, поставленные в очередь при обработке запросов."""
+    words = language_processor.take_queue()
+    try:
+        language_processor.translate_keywords(words)
+    except Exception as e:
+        print(str(e))
+        # Непереведенные слова возвращаются в очередь
+        translations = language_processor.store.get_keywords(words)
+        for word in words:
+            if word not in translations:
+                language_processor.queue_translation(word)
+
 
 def process_articles(database):
-    for db_record in tqdm(
-        database.list(
-            {
-                "parse_status": DocumentStatusType.COMPLETED,
-                "processing_status": DocumentStatusType.WAITING,
-            }
+    with BulkWriter(database) as writer:
+        for db_record in tqdm(
+            database.list(
+                {
+                    "parse_status": DocumentStatusType.COMPLETED,
+                    "processing_status": DocumentStatusType.WAITING,
+                }
+            )
+        ):
+            process_article(db_record, writer)
+
+
+def process_article(db_record: dict, writer: BulkWriter):
+    try:
+        document = ArticleDocument(**db_record)
+        if document.reference and document.language == "russian":
+            # Обработка ключевых слов
+            keywords = keywords_processor.filter_symbols(document.keywords)
+            keywords = keywords_processor.translate(keywords)
+            document.keywords = keywords
+            # Обработка аннотаций
+            abstract = abstract_processor.filter_letters(document.abstract)
+            abstract = language_processor.translate_text(abstract)
+            document.abstract = abstract
+            # Обработка текстов
+            text = articles_processor.fix_letters(document.text)
+            text = articles_processor.cleanup(text)
+            document.text = text
+            document.processing_status = DocumentStatusType.COMPLETED
+
+            # Записываются только измененные поля
+            writer.update(
+                {"_id": db_record.get("_id")},
+                {"$set": get_changed_fields(db_record, document.to_dict())},
+            )
+    except Exception as e:
+        print(str(e))
+
+
+def transform_record(db_record: dict) -> dict | None:
+    """Выполняет преобразования текста статьи, не требующие перевода."""
+    if not db_record.get("reference") or db_record.get("language") != "russian":
+        return None
+    try:
+        keywords = keywords_processor.filter_symbols(db_record.get("keywords", []))
+        abstract = abstract_processor.filter_letters(db_record.get("abstract", ""))
+        text = articles_processor.fix_letters(db_record.get("text", ""))
+        text = articles_processor.cleanup(text)
+    except Exception as e:
+        print(str(e))
+        return None
+    # Пустые ключевые слова отбрасываются при переводе
+    return {
+        "keywords": [keyword for keyword in keywords if keyword],
+        "abstract": abstract,
+        "text": text,
+    }
+
+
+def transform_chunk(db_records: list[dict]) -> list[dict | None]:
+    """Обрабатывает пакет статей в рабочем процессе."""
+    return [transform_record(db_record) for db_record in db_records]
+
+
+def translate_chunk(documents: list[dict | None]) -> None:
+    """Переводит ключевые слова и аннотации пакета статей.
+
+    Языки ключевых слов и аннотаций всего пакета определяются одним
+    вызовом, новые переводы запрашиваются пакетами.
+    """
+    documents = [document for document in documents if document is not None]
+    keywords = [keyword for document in documents for keyword in document["keywords"]]
+    try:
+        keywords = iter(keywords_processor.translate(keywords))
+        for document in documents:
+            document["keywords"] = list(islice(keywords, len(document["keywords"])))
+    except Exception as e:
+        print(str(e))
+        for document in documents:
+            try:
+                document["keywords"] = keywords_processor.translate(
+                    document["keywords"]
+                )
+            except Exception as e:
+                print(str(e))
+                document["error"] = True
+    try:
+        abstracts = language_processor.translate_texts(
+            [document["abstract"] for document in documents]
         )
-    ):
-        try:
-            document = ArticleDocument(**db_record)
-            if document.reference and document.language == "russian":
-                # Обработка ключевых слов
-                keywords = keywords_processor.filter_symbols(document.keywords)
-                keywords = keywords_processor.translate(keywords)
-                document.keywords = keywords
-                # Обработка аннотаций
-                abstract = abstract_processor.filter_letters(document.abstract)
-                abstract = language_processor.translate_text(abstract)
-                document.abstract = abstract
-                # Обработка текстов
-                text = articles_processor.fix_letters(document.text)
-                text = articles_processor.cleanup(text)
-                document.text = text
-                document.processing_status = DocumentStatusType.COMPLETED
-
-                database.update(
-                    {"_id": db_record.get("_id")},
-                    {"$set": document.to_dict()},
+        for document, abstract in zip(documents, abstracts):
+            document["abstract"] = abstract
+    except Exception as e:
+        print(str(e))
+        for document in documents:
+            try:
+                document["abstract"] = language_processor.translate_text(
+                    document["abstract"]
                 )
-        except Exception as e:
-            print(str(e))
+            except Exception as e:
+                print(str(e))
+                document["error"] = True
+
+
+def write_chunk(db_records: list[dict], future, writer: BulkWriter) -> int:
+    """Переводит и записывает результаты обработки пакета статей."""
+    documents = future.result()
+    translate_chunk(documents)
+    for db_record, document in zip(db_records, documents):
+        if document is None or document.pop("error", False):
             continue
+        document["processing_status"] = DocumentStatusType.COMPLETED
+        writer.update(
+            {"_id": db_record["_id"]},
+            {"$set": get_changed_fields(db_record, document)},
+        )
+    return len(db_records)
+
+
+def process_articles_parallel(
+    database,
+    workers: int = BaseConfig.PREPROCESSING_WORKERS,
+    chunk_size: int = BaseConfig.PREPROCESSING_CHUNK_SIZE,
+):
+    """Предобработка статей в нескольких процессах.
+
+    Главный процесс читает статьи пакетами (только нужные поля) и передает
+    их рабочим процессам для обработки текста. Перевод выполняется в главном
+    процессе с общим кэшем переводов, результаты записываются пакетами
+    в порядке чтения.
+    """
+    cursor = database.list(
+        {
+            "parse_status": DocumentStatusType.COMPLETED,
+            "processing_status": DocumentStatusType.WAITING,
+        },
+        projection=PROJECTION,
+    )
+    chunks = iter(lambda: list(islice(cursor, chunk_size)), [])
+    progress = tqdm()
+    with ProcessPoolExecutor(max_workers=workers) as executor, BulkWriter(
+        database
+    ) as writer:
+        # Количество пакетов в обработке ограничено, чтобы не читать
+        # всю коллекцию в память
+        pending = deque()
+        for chunk in chunks:
+            pending.append((chunk, executor.submit(transform_chunk, chunk)))
+            if len(pending) >= workers * 2:
+                progress.update(write_chunk(*pending.popleft(), writer))
+        while pending:
+            progress.update(write_chunk(*pending.popleft(), writer))
+        progress.close()
 
 
 if __name__ == "__main__":
     db = get_mongo_db_document_service()
-    process_articles(db)
-    # Сохраняем словарь переводов
-    language_processor.save_translations(BaseConfig.TRANSLATIONS_CACHE_FILE)
+    process_translations_queue()
+    if BaseConfig.PREPROCESSING_WORKERS > 1:
+        process_articles_parallel(db)
+    else:
+        process_articles(db)
@@ -0,0 +1,29 @@
+import json
+import os
+
+import pytest
+
+from common.processors import TextProcessor
+
+# Пары (текст, результат), полученные прежней реализацией cleanup из
+# последовательных проходов re.sub: граничные случаи, синтетические
+# фрагменты OCR и случайные строки
+GOLDEN_FILE = os.path.join(os.path.dirname(__file__), "data", "cleanup_golden.json")
+
+with open(GOLDEN_FILE, "r", encoding="utf8") as golden_file:
+    GOLDEN = json.load(golden_file)
+
+
+@pytest.fixture(scope="module")
+def processor() -> TextProcessor:
+    return TextProcessor()
+
+
+@pytest.mark.parametrize("case", GOLDEN)
+def test_cleanup_golden(processor: TextProcessor, case: str):
+    mismatches = [
+        (text, expected, result)
+        for text, expected in GOLDEN[case]
+        if (result := processor.cleanup(text)) != expected
+    ]
+    assert not mismatches, mismatches[:5]